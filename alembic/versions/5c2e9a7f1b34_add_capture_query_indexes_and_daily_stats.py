@@ -0,0 +1,63 @@
+"""Add capture query indexes and daily statistics table
+
+Revision ID: 5c2e9a7f1b34
+Revises: d953c36411e0
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7f1b34'
+down_revision: Union[str, Sequence[str], None] = 'd953c36411e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_captures_timestamp_start_mode', 'captures', ['timestamp_start', 'mode'], unique=False)
+    op.create_index('ix_captures_frequency_hz_timestamp_start', 'captures', ['frequency_hz', 'timestamp_start'], unique=False)
+    op.create_table('capture_daily_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('band_hz', sa.Integer(), nullable=False, comment='Lower edge of the frequency band'),
+    sa.Column('mode', sa.String(), nullable=False),
+    sa.Column('capture_count', sa.Integer(), nullable=False),
+    sa.Column('total_duration_s', sa.Float(), nullable=False),
+    sa.Column('rssi_sum_dbm', sa.Float(), nullable=False),
+    sa.Column('rssi_count', sa.Integer(), nullable=False),
+    sa.Column('rssi_max_dbm', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'band_hz', 'mode', name='uq_capture_daily_stats_day_band_mode')
+    )
+    op.create_index(op.f('ix_capture_daily_stats_id'), 'capture_daily_stats', ['id'], unique=False)
+
+    # Backfill the summary from captures that finished before this migration
+    op.execute("""
+        INSERT INTO capture_daily_stats
+            (day, band_hz, mode, capture_count, total_duration_s, rssi_sum_dbm, rssi_count, rssi_max_dbm)
+        SELECT date(timestamp_start),
+               frequency_hz - frequency_hz % 1000000,
+               COALESCE(mode, 'unknown'),
+               COUNT(*),
+               COALESCE(SUM(MAX((julianday(timestamp_end) - julianday(timestamp_start)) * 86400.0, 0)), 0),
+               COALESCE(SUM(rssi_avg_dbm), 0),
+               COUNT(rssi_avg_dbm),
+               MAX(rssi_avg_dbm)
+        FROM captures
+        WHERE timestamp_end IS NOT NULL AND timestamp_start IS NOT NULL AND frequency_hz IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_capture_daily_stats_id'), table_name='capture_daily_stats')
+    op.drop_table('capture_daily_stats')
+    op.drop_index('ix_captures_frequency_hz_timestamp_start', table_name='captures')
+    op.drop_index('ix_captures_timestamp_start_mode', table_name='captures')
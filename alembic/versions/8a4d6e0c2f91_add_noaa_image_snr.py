@@ -0,0 +1,29 @@
+"""Add decode SNR to NOAA images
+
+Revision ID: 8a4d6e0c2f91
+Revises: 5c2e9a7f1b34
+Create Date: 2026-10-19 11:47:05.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d6e0c2f91'
+down_revision: Union[str, Sequence[str], None] = '5c2e9a7f1b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('noaa_images', sa.Column('snr_db', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('noaa_images') as batch_op:
+        batch_op.drop_column('snr_db')
@@ -0,0 +1,31 @@
+"""Record which captures are counted in the daily stats
+
+Revision ID: b7e3f1a9c2d4
+Revises: 8a4d6e0c2f91
+Create Date: 2026-10-19 14:02:31.417260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f1a9c2d4'
+down_revision: Union[str, Sequence[str], None] = '8a4d6e0c2f91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('captures', sa.Column('stats_recorded', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # Finished captures were already counted when the daily stats were built
+    op.execute("UPDATE captures SET stats_recorded = 1 WHERE timestamp_end IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('captures') as batch_op:
+        batch_op.drop_column('stats_recorded')
@@ -1,24 +1,35 @@
-import json
+import asyncio
+import datetime
 import logging
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from pydantic import ValidationError
+from sqlalchemy.orm import Session
 
 # --- Project Structure Setup ---
 # Ensure the script can find modules in the project root
 import sys
 sys.path.append(str(Path(__file__).parent))
 
-from core.config import AppConfig
-from core.database import initialize_database
+from core.config import AppConfig, read_config
+from core import queries
+from core.log import record_event, setup_logging, shutdown_logging
+from core.reload import ConfigReloader
+from core.database import get_db, initialize_database
+from core.stream import SpectrumBroadcaster
 from tracking.tle import TLEManager
 from tracking.predictor import PassPredictor, SatellitePass
+from tracking.parallel import shutdown_pool
+from tracking.scoring import PassScorer, rank_passes
+from sdr.agc import AutoGainControl
 from sdr.hackrf import HackRF
+from storage.occupancy import OccupancyIndex
+from storage.tier import StorageTier
 
 # --- Constants ---
 CONFIG_PATH = Path("config.json")
@@ -42,11 +53,8 @@ def load_configuration() -> AppConfig:
         import shutil
         shutil.copy(CONFIG_EXAMPLE_PATH, CONFIG_PATH)
 
-    with open(CONFIG_PATH, "r") as f:
-        config_data = json.load(f)
-
     try:
-        config = AppConfig.parse_obj(config_data)
+        config = read_config(CONFIG_PATH)
     except ValidationError as e:
         logging.error(f"Configuration validation error in '{CONFIG_PATH}': {e}")
         raise
@@ -60,22 +68,6 @@ def load_configuration() -> AppConfig:
 
     return config
 
-# --- Logging Setup ---
-def setup_logging(log_level: str = "INFO"):
-    """Configures the application's logger."""
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            # Optional: Add a FileHandler here for logging to a file
-            # logging.FileHandler("data/rfsentinel.log")
-        ],
-    )
-    logging.getLogger("uvicorn").setLevel(log_level)
-    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-
-
 # --- Application Lifespan Management ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -89,7 +81,7 @@ async def lifespan(app: FastAPI):
     # 1. Load Configuration
     try:
         app.state.config = load_configuration()
-        setup_logging(app.state.config.logging.level)
+        app.state.logging = setup_logging(app.state.config.logging)
         logging.info("Configuration loaded and validated successfully.")
     except (FileNotFoundError, ValidationError) as e:
         logging.critical(f"Fatal error during configuration load: {e}", exc_info=True)
@@ -100,12 +92,25 @@ async def lifespan(app: FastAPI):
     initialize_database(str(app.state.config.data_paths.db))
     logging.info(f"Database initialized at '{app.state.config.data_paths.db}'")
 
+    # 2b. Start the capture storage tier (compression and retention)
+    app.state.storage_tier = None
+    if app.state.config.storage.enabled:
+        app.state.storage_tier = StorageTier(app.state.config)
+        app.state.storage_tier.start()
+
+    # 2c. Open the RF occupancy index
+    app.state.occupancy_index = None
+    if app.state.config.occupancy.enabled:
+        app.state.occupancy_index = OccupancyIndex(app.state.config.data_paths.occupancy, app.state.config.occupancy)
+        app.state.occupancy_index.start()
+
     # 3. Initialize Satellite Tracker
     try:
         tle_manager = TLEManager(app.state.config)
         tle_manager.load_satellites()
         app.state.tle_manager = tle_manager
         app.state.pass_predictor = PassPredictor(app.state.config, tle_manager)
+        app.state.pass_predictor.scorer = PassScorer(app.state.config)
         logging.info("Satellite tracking modules initialized successfully.")
     except Exception as e:
         logging.error(f"Failed to initialize satellite tracker: {e}", exc_info=True)
@@ -117,16 +122,53 @@ async def lifespan(app: FastAPI):
     if sdr_device.open():
         logging.info("HackRF device connected successfully.")
         app.state.sdr_device = sdr_device
+        # Stream continuously into the RX ring read by the spectrum stream and AGC
+        sdr_config = app.state.config.sdr
+        try:
+            sdr_device.set_sample_rate(sdr_config.sample_rate_hz)
+            sdr_device.set_frequency(sdr_config.center_freq_hz)
+            sdr_device.set_lna_gain(sdr_config.gain_lna)
+            sdr_device.set_vga_gain(sdr_config.gain_vga)
+            sdr_device.start_rx_stream()
+        except Exception as e:
+            record_event("device_error", f"Failed to start the HackRF RX stream: {e}", level=logging.ERROR)
     else:
         logging.warning("Could not connect to HackRF device. SDR functions will be unavailable.")
         app.state.sdr_device = None
 
+    # 4b. Start automatic gain control on the RX stream
+    app.state.agc = None
+    if app.state.sdr_device and app.state.config.sdr.agc.enabled:
+        app.state.agc = AutoGainControl(app.state.sdr_device, app.state.config.sdr)
+        app.state.agc.start()
+
+    # 5. Start the live spectrum stream
+    app.state.spectrum_broadcaster = SpectrumBroadcaster(app.state.sdr_device, app.state.config.stream)
+    await app.state.spectrum_broadcaster.start()
+
+    # 6. Watch the configuration file for changes
+    app.state.config_reloader = ConfigReloader(app.state, CONFIG_PATH)
+    app.state.config_reloader.start()
+
+    record_event("startup", "RFSentinel started.")
+
     yield  # --- Application is now running ---
 
     # --- Shutdown Logic ---
     logging.info("--- RFSentinel Shutting Down ---")
+    app.state.config_reloader.stop()
+    await app.state.spectrum_broadcaster.stop()
+    if app.state.agc:
+        app.state.agc.stop()
+    if app.state.storage_tier:
+        app.state.storage_tier.stop()
+    if app.state.occupancy_index:
+        app.state.occupancy_index.stop()
+    shutdown_pool()
     if app.state.sdr_device:
         app.state.sdr_device.close()
+    record_event("shutdown", "RFSentinel stopped.")
+    shutdown_logging()
 
 # --- Application Setup ---
 app = FastAPI(
@@ -147,12 +189,34 @@ async def root():
 
 # --- API Endpoints ---
 
+@app.post("/config/reload", summary="Reload config.json and apply the changes")
+def reload_config(request: Request):
+    """
+    Validates config.json and applies the changed sections to the running
+    service. The running configuration is kept if the file is invalid or a
+    change cannot be applied.
+    """
+    reloader: ConfigReloader = request.app.state.config_reloader
+    try:
+        return reloader.reload()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid configuration: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Configuration could not be applied: {e}")
+
 @app.get("/sdr/status", summary="Get SDR device status")
 async def get_sdr_status(request: Request):
     """Checks and returns the connection status of the HackRF device."""
     sdr_device: Optional[HackRF] = getattr(request.app.state, 'sdr_device', None)
     if sdr_device and sdr_device.is_open:
-        return {"status": "connected", "device_info": "HackRF One"}
+        agc: Optional[AutoGainControl] = getattr(request.app.state, 'agc', None)
+        return {
+            "status": "connected",
+            "device_info": "HackRF One",
+            "gains": {"lna": sdr_device.lna_gain_db, "vga": sdr_device.vga_gain_db, "agc": agc is not None},
+            "rms_dbfs": agc.last_rms_dbfs if agc else None,
+            "clip_ratio": agc.last_clip_ratio if agc else None,
+        }
     return {"status": "disconnected", "device_info": None}
 
 @app.get(
@@ -160,18 +224,196 @@ async def get_sdr_status(request: Request):
     response_model=Optional[SatellitePass],
     summary="Get the next upcoming satellite pass",
 )
-async def get_next_pass(request: Request):
+def get_next_pass(request: Request, station: Optional[str] = None):
     """
     Calculates and returns the details of the very next satellite pass
-    with an elevation greater than the configured minimum.
+    with an elevation greater than the configured minimum. The primary
+    ground station is used unless another one is named.
     """
     pass_predictor: Optional[PassPredictor] = getattr(request.app.state, 'pass_predictor', None)
     if not pass_predictor:
         raise Exception("Pass predictor is not available.")
 
-    upcoming_passes = pass_predictor.find_upcoming_passes(hours_ahead=72)
+    try:
+        upcoming_passes = pass_predictor.find_upcoming_passes(hours_ahead=72, station=station)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ground station '{station}'.")
     return upcoming_passes[0] if upcoming_passes else None
 
+@app.get(
+    "/tracking/passes",
+    response_model=List[SatellitePass],
+    summary="List upcoming satellite passes, optionally ranked by quality score",
+)
+def get_upcoming_passes(
+    request: Request,
+    station: Optional[str] = None,
+    hours_ahead: int = Query(24, ge=1, le=240),
+    ranked: bool = False,
+):
+    """
+    Returns the upcoming passes of a ground station in chronological order,
+    or from best to worst predicted quality when `ranked` is set.
+    """
+    pass_predictor: Optional[PassPredictor] = getattr(request.app.state, 'pass_predictor', None)
+    if not pass_predictor:
+        raise Exception("Pass predictor is not available.")
+
+    try:
+        upcoming_passes = pass_predictor.find_upcoming_passes(hours_ahead=hours_ahead, station=station)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown ground station '{station}'.")
+    return rank_passes(upcoming_passes) if ranked else upcoming_passes
+
+@app.get(
+    "/tracking/stations/next-pass",
+    response_model=Dict[str, Optional[SatellitePass]],
+    summary="Get the next upcoming satellite pass for every ground station",
+)
+def get_next_pass_by_station(request: Request):
+    """
+    Returns the very next satellite pass of each configured ground station.
+    All stations share a single propagation of every satellite.
+    """
+    pass_predictor: Optional[PassPredictor] = getattr(request.app.state, 'pass_predictor', None)
+    if not pass_predictor:
+        raise Exception("Pass predictor is not available.")
+
+    upcoming = pass_predictor.find_upcoming_passes_by_station(hours_ahead=72)
+    return {name: passes[0] if passes else None for name, passes in upcoming.items()}
+
+def _capture_to_dict(capture) -> dict:
+    return {
+        "uuid": capture.uuid,
+        "mode": capture.mode,
+        "frequency_hz": capture.frequency_hz,
+        "bandwidth_hz": capture.bandwidth_hz,
+        "gains": capture.gains,
+        "timestamp_start": capture.timestamp_start,
+        "timestamp_end": capture.timestamp_end,
+        "rssi_avg_dbm": capture.rssi_avg_dbm,
+        "file_paths": capture.file_paths,
+    }
+
+@app.get("/captures", summary="List captures by time window and optional frequency band")
+def list_captures(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    mode: Optional[str] = None,
+    freq_min_hz: Optional[int] = None,
+    freq_max_hz: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Lists captures in start order using keyset pagination. Pass the returned
+    `next_cursor` back as `cursor` to fetch the following page.
+    """
+    try:
+        if freq_min_hz is not None or freq_max_hz is not None:
+            page = queries.captures_in_band(
+                db, freq_min_hz or 0, freq_max_hz if freq_max_hz is not None else 2**63 - 1,
+                start=start, end=end, mode=mode, cursor=cursor, limit=limit,
+            )
+        else:
+            page = queries.captures_in_window(db, start, end, mode=mode, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return {"items": [_capture_to_dict(c) for c in page.items], "next_cursor": page.next_cursor}
+
+@app.get("/captures/stats/daily", summary="Get daily capture statistics per frequency band")
+def get_daily_capture_stats(
+    start_day: datetime.date,
+    end_day: datetime.date,
+    freq_min_hz: Optional[int] = None,
+    freq_max_hz: Optional[int] = None,
+    mode: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Returns the incrementally maintained daily statistics, one row per day, band and mode."""
+    stats = queries.daily_band_stats(db, start_day, end_day, freq_min_hz, freq_max_hz, mode)
+    return [
+        {
+            "day": row.day,
+            "band_hz": row.band_hz,
+            "mode": row.mode,
+            "capture_count": row.capture_count,
+            "total_duration_s": row.total_duration_s,
+            "rssi_avg_dbm": row.rssi_sum_dbm / row.rssi_count if row.rssi_count else None,
+            "rssi_max_dbm": row.rssi_max_dbm,
+        }
+        for row in stats
+    ]
+
+@app.get("/occupancy", summary="Get when a frequency band was busy")
+async def get_occupancy(
+    request: Request,
+    freq_min_hz: int,
+    freq_max_hz: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    per_bin: bool = False,
+):
+    """
+    Answers band/time occupancy queries from the occupancy index, without
+    touching stored spectra. Returns the merged busy intervals of the band
+    and, with `per_bin`, the observed and active time of each frequency bin.
+    """
+    index: Optional[OccupancyIndex] = getattr(request.app.state, 'occupancy_index', None)
+    if not index:
+        raise HTTPException(status_code=503, detail="Occupancy index is disabled.")
+    if freq_max_hz < freq_min_hz or end <= start:
+        raise HTTPException(status_code=400, detail="Empty frequency range or time window.")
+
+    result = index.query(freq_min_hz, freq_max_hz, start, end)
+    response = {
+        "bin_hz": index.bin_hz,
+        "bucket_s": index.bucket_s,
+        "observed_s": int(result.observed_s.max(initial=0)),
+        "busy": [{"start": s, "end": e} for s, e in result.intervals],
+    }
+    if per_bin:
+        response["bins"] = [
+            {"freq_hz": int(f), "observed_s": int(o), "active_s": int(a)}
+            for f, o, a in zip(result.freqs_hz, result.observed_s, result.active_s)
+        ]
+    return response
+
+@app.websocket("/ws/spectrum")
+async def stream_spectrum(websocket: WebSocket):
+    """
+    Streams binary spectrum and capture progress frames (see core/stream.py
+    for the format). Slow clients lose their oldest frames.
+    """
+    broadcaster: Optional[SpectrumBroadcaster] = getattr(websocket.app.state, 'spectrum_broadcaster', None)
+    if not broadcaster:
+        await websocket.close(code=1011)
+        return
+
+    await websocket.accept()
+    queue = broadcaster.subscribe()
+    # Wait for frames and client messages at once, so a disconnect is noticed
+    # even while no frames are flowing
+    receive = asyncio.ensure_future(websocket.receive())
+    next_frame = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            await asyncio.wait({receive, next_frame}, return_when=asyncio.FIRST_COMPLETED)
+            if receive.done():
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                receive = asyncio.ensure_future(websocket.receive())  # clients' messages are ignored
+            if next_frame.done():
+                await websocket.send_bytes(next_frame.result())
+                next_frame = asyncio.ensure_future(queue.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        next_frame.cancel()
+        broadcaster.unsubscribe(queue)
+
 # --- Main Execution ---
 if __name__ == "__main__":
     # This block allows running the app directly with `python app.py`
@@ -0,0 +1,197 @@
+"""
+Benchmarks the capture query layer (core/queries.py) on a synthetic database.
+
+A temporary SQLite database is filled with idle-scan-like captures, then each
+query helper is timed and its SQLite query plan printed, first without and
+then with the composite indexes. The daily summary table is compared against
+the equivalent aggregation over the captures table.
+
+Usage:
+    python benchmarks/bench_capture_queries.py --rows 10000000
+"""
+import argparse
+import datetime
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import database, queries
+from core.models import Capture
+
+COMPOSITE_INDEXES = ("ix_captures_timestamp_start_mode", "ix_captures_frequency_hz_timestamp_start")
+MODES = np.array(["idle", "idle", "idle", "idle", "idle", "idle", "idle", "idle", "manual", "priority"])
+NOAA_FREQS_HZ = np.array([137_100_000, 137_620_000, 137_912_500])
+# Frequencies of interest revisited by manual captures
+MANUAL_FREQS_HZ = np.random.default_rng(7).integers(1_000_000, 6_000_000_000, 50)
+BATCH = 200_000
+
+
+def populate(rows: int, days: int):
+    """Bulk-loads captures in time order, as idle scanning would produce them."""
+    start = np.datetime64("2025-01-01T00:00:00", "us")
+    span_us = days * 86400 * 1_000_000
+    rng = np.random.default_rng(42)
+
+    conn = database.engine.raw_connection()
+    cursor = conn.cursor()
+    for first in range(0, rows, BATCH):
+        n = min(BATCH, rows - first)
+        ids = np.arange(first, first + n)
+        starts = start + (ids * (span_us // rows)).astype("timedelta64[us]")
+        ends = starts + np.timedelta64(10, "s")
+        modes = MODES[ids % len(MODES)]
+        # Idle scans step through fixed centers, priority captures use the NOAA APT
+        # frequencies and manual captures revisit a handful of frequencies of interest
+        freqs = np.where(modes == "idle", rng.integers(1, 300, n) * 20_000_000, rng.choice(MANUAL_FREQS_HZ, n))
+        freqs = np.where(modes == "priority", rng.choice(NOAA_FREQS_HZ, n), freqs)
+        rssi = rng.normal(-70, 8, n).round(1)
+        fmt = lambda a: np.char.replace(np.datetime_as_string(a, unit="us"), "T", " ")
+        cursor.executemany(
+            "INSERT INTO captures (uuid, mode, frequency_hz, bandwidth_hz, timestamp_start, timestamp_end, rssi_avg_dbm)"
+            " VALUES (?, ?, ?, 20000000, ?, ?, ?)",
+            zip((f"{i:032x}" for i in ids.tolist()), modes.tolist(), freqs.tolist(),
+                fmt(starts).tolist(), fmt(ends).tolist(), rssi.tolist()),
+        )
+        conn.commit()
+        print(f"\r  loaded {first + n:,} / {rows:,} rows", end="", flush=True)
+    print()
+
+    # Same aggregation as the migration backfill
+    cursor.execute("""
+        INSERT INTO capture_daily_stats
+            (day, band_hz, mode, capture_count, total_duration_s, rssi_sum_dbm, rssi_count, rssi_max_dbm)
+        SELECT date(timestamp_start), frequency_hz - frequency_hz % 1000000, mode, COUNT(*),
+               SUM((julianday(timestamp_end) - julianday(timestamp_start)) * 86400.0),
+               SUM(rssi_avg_dbm), COUNT(rssi_avg_dbm), MAX(rssi_avg_dbm)
+        FROM captures GROUP BY 1, 2, 3
+    """)
+    conn.commit()
+    conn.close()
+
+
+def explain(statement: str, parameters) -> str:
+    conn = database.engine.raw_connection()
+    try:
+        plan = conn.cursor().execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        return "\n".join(f"      {row[-1]}" for row in plan)
+    finally:
+        conn.close()
+
+
+def run_case(name: str, fetch_page, pages: int):
+    """Times the first page and walks `pages` further pages with the keyset cursor."""
+    captured = []
+
+    def capture_sql(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", capture_sql)
+    db = database.SessionLocal()
+    try:
+        timings = []
+        cursor = None
+        for _ in range(pages + 1):
+            t0 = time.perf_counter()
+            page = fetch_page(db, cursor)
+            timings.append((time.perf_counter() - t0) * 1000)
+            db.expunge_all()
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+    finally:
+        db.close()
+        event.remove(database.engine, "before_cursor_execute", capture_sql)
+
+    print(f"  {name}")
+    print(f"    first page {timings[0]:.2f} ms, median page {statistics.median(timings):.2f} ms over {len(timings)} pages")
+    print("    plan:")
+    print(explain(*captured[-1]))
+
+
+def run_queries(pages: int, days: int):
+    t_mid = datetime.datetime(2025, 1, 1) + datetime.timedelta(days=days / 2)
+    t_end = t_mid + datetime.timedelta(hours=6)
+
+    run_case("time window, mode='priority'",
+             lambda db, c: queries.captures_in_window(db, t_mid, t_end, mode="priority", cursor=c), pages)
+    run_case("time window, all modes",
+             lambda db, c: queries.captures_in_window(db, t_mid, t_end, cursor=c), pages)
+    run_case("band 137-138 MHz, one day",
+             lambda db, c: queries.captures_in_band(db, 137_000_000, 138_000_000, t_mid,
+                                                    t_mid + datetime.timedelta(days=1), cursor=c), pages)
+    freq_hz = int(MANUAL_FREQS_HZ[0])
+    run_case(f"one frequency ({freq_hz / 1e6:.3f} MHz), all time",
+             lambda db, c: queries.captures_in_band(db, freq_hz, freq_hz, cursor=c), pages)
+    run_case(f"band {freq_hz / 1e6 - 1:.0f}-{freq_hz / 1e6 + 1:.0f} MHz, all time",
+             lambda db, c: queries.captures_in_band(db, freq_hz - 1_000_000, freq_hz + 1_000_000, cursor=c), pages)
+
+
+def run_summary(days: int):
+    """Compares a 30-day, all-band summary from the stats table with aggregating the captures."""
+    db = database.SessionLocal()
+    try:
+        start = datetime.date(2025, 1, 1) + datetime.timedelta(days=max(days - 30, 0))
+        end = start + datetime.timedelta(days=30)
+        queries.daily_band_stats(db, start, start)  # warm up statement compilation
+
+        t0 = time.perf_counter()
+        stats = queries.daily_band_stats(db, start, end)
+        summary_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        db.connection().exec_driver_sql(
+            "SELECT date(timestamp_start), frequency_hz - frequency_hz % 1000000, mode,"
+            " COUNT(*), AVG(rssi_avg_dbm), MAX(rssi_avg_dbm) FROM captures"
+            " WHERE timestamp_start >= ? AND timestamp_start < ? GROUP BY 1, 2, 3",
+            (f"{start} 00:00:00", f"{end + datetime.timedelta(days=1)} 00:00:00"),
+        ).fetchall()
+        scan_ms = (time.perf_counter() - t0) * 1000
+    finally:
+        db.close()
+
+    print(f"  30 days, all bands: summary table {summary_ms:.2f} ms ({len(stats):,} rows), "
+          f"aggregating captures {scan_ms:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of captures to generate.")
+    parser.add_argument("--days", type=int, default=365, help="Time span covered by the captures.")
+    parser.add_argument("--pages", type=int, default=50, help="Pages walked per query.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.initialize_database(str(Path(tmp) / "bench.db"))
+        indexes = {index.name: index for index in Capture.__table__.indexes}
+
+        print(f"Populating {args.rows:,} captures over {args.days} days...")
+        for name in COMPOSITE_INDEXES:
+            indexes[name].drop(database.engine)
+        populate(args.rows, args.days)
+
+        print("\nWithout composite indexes:")
+        run_queries(args.pages, args.days)
+
+        t0 = time.perf_counter()
+        for name in COMPOSITE_INDEXES:
+            indexes[name].create(database.engine)
+        database.engine.raw_connection().execute("ANALYZE")
+        print(f"\nBuilt composite indexes in {time.perf_counter() - t0:.1f} s.")
+
+        print("\nWith composite indexes:")
+        run_queries(args.pages, args.days)
+
+        print("\nSummary table:")
+        run_summary(args.days)
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
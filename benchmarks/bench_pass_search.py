@@ -0,0 +1,74 @@
+"""
+Benchmarks pass search scaling from 1 to N worker processes.
+
+Satellites are loaded from the checked-in data/noaa_tle.txt, so no network
+access is needed. Every run clears the schedule cache and times a full
+search; the first search of each worker count is discarded so worker
+start-up and warm-up are not counted.
+
+Usage:
+    python benchmarks/bench_pass_search.py --hours 72 --stations 3 --max-workers 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.config import AppConfig, StationConfig
+from tracking.parallel import shutdown_pool
+from tracking.predictor import PassPredictor
+from tracking.tle import TLEManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=int, default=72, help="Prediction window in hours.")
+    parser.add_argument("--stations", type=int, default=1, help="Number of ground stations.")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count(), help="Largest worker count to try.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed searches per worker count.")
+    args = parser.parse_args()
+
+    with open(ROOT / "config.json.example") as f:
+        config = AppConfig.parse_obj(json.load(f))
+    config.data_paths.base = ROOT / "data"
+    config.noaa.tle_cache_days = 100000  # always use the checked-in TLE file
+    config.stations = [
+        StationConfig(name=f"station-{i}", latitude=-60 + 120 * i / args.stations,
+                      longitude=-180 + 360 * i / args.stations, elevation_m=0)
+        for i in range(1, args.stations)
+    ]
+
+    tle_manager = TLEManager(config)
+    tle_manager.load_satellites()
+    print(f"{len(tle_manager.satellites)} satellites, {args.stations} stations, {args.hours} h window, "
+          f"{os.cpu_count()} CPUs\n")
+
+    baseline = None
+    print(f"{'workers':>7} {'median s':>9} {'speedup':>8} {'passes':>7}")
+    for workers in range(1, args.max_workers + 1):
+        config.tracking.workers = workers
+        predictor = PassPredictor(config, tle_manager)
+
+        timings = []
+        for i in range(args.repeats + 1):
+            predictor.invalidate_cache()
+            t0 = time.perf_counter()
+            passes = predictor.find_upcoming_passes_by_station(args.hours)
+            if i:
+                timings.append(time.perf_counter() - t0)
+
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{workers:>7} {median:>9.3f} {baseline / median:>7.2f}x {sum(map(len, passes.values())):>7}")
+
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
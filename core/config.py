@@ -1,18 +1,39 @@
+import json
+
 from pydantic import BaseModel, Field, HttpUrl
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # --- Pydantic Models for Configuration ---
 
 class StationConfig(BaseModel):
-    """Defines the geographic location of the ground station."""
+    """Defines the geographic location of a ground station."""
+    name: str = Field("default", min_length=1, description="Unique name identifying the station.")
     latitude: float = Field(..., ge=-90, le=90, description="Latitude in decimal degrees.")
     longitude: float = Field(..., ge=-180, le=180, description="Longitude in decimal degrees.")
     elevation_m: int = Field(..., description="Elevation in meters above sea level.")
 
+class AgcConfig(BaseModel):
+    """Defines settings for the automatic gain control loop."""
+    enabled: bool = Field(False, description="Adjust the LNA/VGA gains from the RX signal statistics instead of keeping them fixed.")
+    block_samples: int = Field(65536, ge=1024, description="I/Q samples per statistics block.")
+    interval_s: float = Field(0.2, gt=0, description="Seconds between evaluations of newly received blocks.")
+    target_rms_dbfs: float = Field(-25.0, le=0, description="RMS level in dBFS the loop steers towards.")
+    deadband_db: float = Field(6.0, gt=0, description="Half-width of the band around the target within which gains are left alone.")
+    max_clip_ratio: float = Field(1e-4, ge=0, le=1, description="Fraction of full-scale I/Q values above which gain is reduced.")
+    trigger_blocks: int = Field(3, ge=1, description="Consecutive blocks that must call for the same change before it is applied.")
+    holdoff_blocks: int = Field(4, ge=0, description="Blocks ignored after a gain change while the signal settles.")
+    max_step_db: int = Field(12, ge=2, description="Largest total gain change applied in one step.")
+    vga_floor_db: int = Field(16, ge=0, le=62, description="Gain given to the VGA before the LNA is raised.")
+    calibration_s: float = Field(0.1, gt=0, description="Length in seconds of each calibration capture.")
+
 class SdrConfig(BaseModel):
     """Defines settings for the SDR hardware."""
     gain_lna: int = Field(..., ge=0, le=40, description="LNA (low-noise amplifier) gain in dB.")
     gain_vga: int = Field(..., ge=0, le=62, description="VGA (variable-gain amplifier) gain in dB.")
+    center_freq_hz: int = Field(100_000_000, ge=1_000_000, le=6_000_000_000, description="Frequency the receiver is tuned to when RX starts.")
+    sample_rate_hz: int = Field(2_000_000, ge=2_000_000, le=20_000_000, description="RX sample rate in samples per second.")
+    agc: AgcConfig = Field(default_factory=AgcConfig)
 
 class NoaaConfig(BaseModel):
     """Defines settings for NOAA satellite tracking and decoding."""
@@ -26,22 +47,107 @@ class IdleScanConfig(BaseModel):
     step_mhz: int = Field(20, gt=0, description="Frequency step in MHz for each scan block.")
     duration_s: int = Field(10, gt=0, description="Duration in seconds for each scan block capture.")
 
+class ScoringConfig(BaseModel):
+    """Defines the relative weights of the pass-quality score terms."""
+    elevation_time: float = Field(0.4, ge=0, description="Weight of the time spent at high elevation.")
+    range: float = Field(0.2, ge=0, description="Weight of the closest slant range.")
+    sunlit: float = Field(0.2, ge=0, description="Weight of the daylight fraction of the ground track (visible-channel imagery).")
+    snr: float = Field(0.2, ge=0, description="Weight of the satellite's historical decode SNR.")
+
+class TrackingConfig(BaseModel):
+    """Defines settings for satellite pass prediction."""
+    grid_step_s: float = Field(30.0, gt=0, le=120, description="Time step in seconds of the shared propagation grid used to search for passes.")
+    workers: int = Field(1, ge=1, le=64, description="Worker processes searching for passes in parallel; 1 searches in-process.")
+    scoring: ScoringConfig = Field(default_factory=ScoringConfig)
+
+class StreamConfig(BaseModel):
+    """Defines settings for the live spectrum WebSocket stream."""
+    fft_size: int = Field(2048, ge=64, le=65535, description="Number of FFT bins computed per frame.")
+    averages: int = Field(4, ge=1, le=64, description="Number of consecutive FFTs averaged into each frame; limited to what the SDR's RX ring holds.")
+    bins: int = Field(512, ge=16, le=65535, description="Number of bins sent to clients after peak-hold decimation (at most 65535, the frame header's bin count field).")
+    fps: float = Field(10.0, gt=0, le=60, description="Spectrum frames computed per second.")
+    db_min: float = Field(-110.0, description="Power in dBFS mapped to 0 when quantizing frames.")
+    db_max: float = Field(-10.0, description="Power in dBFS mapped to 255 when quantizing frames.")
+    client_queue_frames: int = Field(8, ge=1, description="Frames buffered per client before the oldest is dropped.")
+
+class StorageConfig(BaseModel):
+    """Defines settings for compressing and expiring stored captures."""
+    enabled: bool = Field(True, description="Run the background storage tier.")
+    workers: int = Field(2, ge=1, description="Number of worker processes compressing captures.")
+    scan_interval_s: float = Field(60.0, gt=0, description="Seconds between storage maintenance runs.")
+    min_age_s: float = Field(60.0, ge=0, description="Seconds a capture must have been finished before it is compressed.")
+    chunk_samples: int = Field(262144, gt=0, description="Complex samples per independently decompressible chunk.")
+    compression_level: int = Field(3, ge=1, le=22, description="Codec compression level.")
+    lossy_bits: Dict[str, int] = Field(default_factory=dict, description="Bits kept per I/Q value, by capture mode (e.g. {'idle': 4}); 8 or absent is lossless.")
+    retention_days: Dict[str, float] = Field(default_factory=dict, description="Days to keep capture files, by capture mode; absent modes are kept indefinitely.")
+    min_free_gb: float = Field(0.0, ge=0, description="Evict the oldest capture files while free disk space is below this; 0 disables eviction.")
+    eviction_order: List[str] = Field(["idle", "manual"], description="Capture modes in the order they are evicted to free space; unlisted modes (by default 'priority') are never evicted.")
+
+class OccupancyConfig(BaseModel):
+    """Defines the RF activity (occupancy) index built from idle-scan detections."""
+    enabled: bool = Field(True, description="Maintain the occupancy index.")
+    freq_min_hz: int = Field(1_000_000, ge=0, description="Lowest frequency covered by the index.")
+    freq_max_hz: int = Field(6_000_000_000, gt=0, description="Highest frequency covered by the index.")
+    bin_hz: int = Field(1_000_000, gt=0, description="Width of each frequency bin.")
+    bucket_s: int = Field(300, gt=0, description="Length in seconds of each time bucket.")
+    retention_days: float = Field(35.0, gt=0, description="Days of activity kept; older buckets are overwritten.")
+    capture_threshold_dbm: float = Field(-60.0, description="Average RSSI above which an idle-scan capture marks its band as active.")
+    detection_threshold_db: float = Field(10.0, gt=0, description="Spectrum bins this far above the median noise floor are detections.")
+    flush_interval_s: float = Field(60.0, gt=0, description="Seconds between flushes of the index to disk.")
+
 class DataPathsConfig(BaseModel):
     """Defines the directory structure for storing data."""
     base: Path = Field("data", description="Base directory for all data.")
     captures: Path = Field("data/captures", description="Directory for raw IQ and WAV captures.")
     decoded: Path = Field("data/decoded", description="Directory for decoded images and data.")
     db: Path = Field("data/rfsentinel.db", description="Path to the SQLite database file.")
+    occupancy: Path = Field("data/occupancy", description="Directory for the memory-mapped RF occupancy index.")
 
 class LoggingConfig(BaseModel):
     """Defines logging settings."""
     level: str = Field("INFO", pattern=r"^(DEBUG|INFO|WARNING|ERROR|CRITICAL)$", description="Logging level.")
+    format: str = Field("json", pattern=r"^(json|text)$", description="Console output format: structured JSON lines or plain text.")
+    file: Optional[Path] = Field(None, description="Optional file receiving JSON log lines.")
+    queue_size: int = Field(10000, ge=100, description="Records buffered for the logging thread before new ones are dropped.")
+    rate_limit_per_s: float = Field(50.0, gt=0, description="Sustained records per second allowed per subsystem.")
+    rate_limit_burst: int = Field(200, ge=1, description="Records a subsystem may log in a burst above the sustained rate.")
+    journal_batch_size: int = Field(100, ge=1, description="Events written to the events table per transaction.")
+    journal_flush_interval_s: float = Field(2.0, gt=0, description="Longest time an event waits before it is written.")
+
+class ReloadConfig(BaseModel):
+    """Defines settings for reloading the configuration file while running."""
+    enabled: bool = Field(True, description="Watch the configuration file and apply changes without a restart.")
+    poll_interval_s: float = Field(2.0, gt=0, description="Seconds between checks of the configuration file.")
 
 class AppConfig(BaseModel):
     """The main configuration model for the entire application."""
     station: StationConfig
+    stations: List[StationConfig] = Field(default_factory=list, description="Additional ground stations to plan passes for.")
     sdr: SdrConfig
     noaa: NoaaConfig
     idle_scan: IdleScanConfig = Field(..., alias="idle_scan")
     data_paths: DataPathsConfig = Field(..., alias="data_paths")
-    logging: LoggingConfig
\ No newline at end of file
+    logging: LoggingConfig
+    tracking: TrackingConfig = Field(default_factory=TrackingConfig)
+    stream: StreamConfig = Field(default_factory=StreamConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+    occupancy: OccupancyConfig = Field(default_factory=OccupancyConfig)
+    reload: ReloadConfig = Field(default_factory=ReloadConfig)
+
+    def all_stations(self) -> List[StationConfig]:
+        """Returns the primary station followed by any additional stations."""
+        return [self.station, *self.stations]
+
+
+def read_config(path: Path) -> AppConfig:
+    """
+    Reads and validates a configuration file.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it is not valid JSON.
+        ValidationError: If it does not match the configuration model.
+    """
+    with open(path, "r") as f:
+        config_data = json.load(f)
+    return AppConfig.parse_obj(config_data)
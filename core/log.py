@@ -0,0 +1,385 @@
+import datetime
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import database
+from .models import Event
+
+# This module sets up the application's non-blocking logging pipeline.
+#
+# Logging calls only filter and enqueue the record: a QueueHandler on the
+# root logger puts it on a bounded queue (records are dropped and counted if
+# the queue is full) and a QueueListener thread formats and writes it. The
+# caller's thread never does I/O, so a burst of log lines cannot stall the
+# RX or decode threads.
+#
+# Records are tagged with the subsystem they come from (the top-level package
+# of the calling module: sdr, tracking, storage, ...) and each subsystem is
+# rate limited by a token bucket before enqueueing. Suppressed records are
+# counted and reported on the next record that passes.
+#
+# Records logged through `record_event` are also journaled: the EventJournal
+# handler batches them into the `events` table in grouped transactions.
+# Events are journaled whatever the logging level; the level only filters
+# them from the console and the log file.
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Attribute names of a bare LogRecord; anything else was passed in `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+# Attributes set by this pipeline, not copied into the JSON `fields`
+_PIPELINE_ATTRS = {"subsystem", "suppressed", "event_type"}
+
+_subsystems: Dict[str, str] = {}
+_pipeline: Optional["LoggingPipeline"] = None
+
+
+def _subsystem(record: logging.LogRecord) -> str:
+    """Names the subsystem of a record: its logger, or the package of the calling module."""
+    if record.name != "root":
+        return record.name.split(".", 1)[0]
+    subsystem = _subsystems.get(record.pathname)
+    if subsystem is None:
+        relative = os.path.relpath(record.pathname, PROJECT_ROOT)
+        if relative.startswith(".."):
+            subsystem = record.module
+        else:
+            subsystem = Path(relative).parts[0].removesuffix(".py")
+        _subsystems[record.pathname] = subsystem
+    return subsystem
+
+
+# --- Enqueue Side (runs in the caller's thread) ---
+
+class SubsystemRateLimiter(logging.Filter):
+    """
+    A token bucket per subsystem. Journaled events are never suppressed.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int):
+        super().__init__()
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        # subsystem -> [tokens, last refill time, suppressed count]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        subsystem = record.subsystem = _subsystem(record)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(subsystem)
+            if bucket is None:
+                bucket = self._buckets[subsystem] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_s)
+            bucket[1] = now
+
+            if bucket[0] < 1.0 and not hasattr(record, "event_type"):
+                bucket[2] += 1
+                return False
+            bucket[0] = max(bucket[0] - 1.0, 0.0)
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records without formatting them and without ever blocking.
+    The queue is a lock-free SimpleQueue; the size limit is checked before
+    each put, so it may be exceeded by a few records under contention.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Enqueueing is thread-safe on its own; skip the handler lock
+        passed = self.filter(record)
+        if passed:
+            self.enqueue(self.prepare(passed if isinstance(passed, logging.LogRecord) else record))
+        return bool(passed)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread. Only a traceback must be
+        # rendered now, while its frames are still alive.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+# --- Listener Side (runs on the background thread) ---
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "subsystem": getattr(record, "subsystem", record.name),
+            "msg": record.getMessage(),
+        }
+        if hasattr(record, "event_type"):
+            entry["event"] = record.event_type
+        if hasattr(record, "suppressed"):
+            entry["suppressed"] = record.suppressed
+
+        fields = {
+            key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key not in _PIPELINE_ATTRS
+        }
+        if fields:
+            entry["fields"] = fields
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _EventLevelFilter(logging.Filter):
+    """
+    Drops journaled events below the root logger's level. Events skip the
+    logger's level check so they are always journaled; this keeps output
+    handlers as quiet as the configured level.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not hasattr(record, "event_type") or record.levelno >= logging.getLogger().getEffectiveLevel()
+
+
+class TextFormatter(logging.Formatter):
+    """The classic line format, with the subsystem and suppression count added."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(subsystem)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "subsystem"):
+            record.subsystem = _subsystem(record)
+        line = super().format(record)
+        if hasattr(record, "suppressed"):
+            line += f" ({record.suppressed} similar records suppressed)"
+        return line
+
+
+class EventJournal(logging.Handler):
+    """
+    Batches journaled events into the `events` table. Events wait in memory
+    until `batch_size` have accumulated or `flush_interval_s` has passed, and
+    each batch is written in one transaction.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval_s: float = 2.0, max_pending: int = 10000):
+        super().__init__()
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[dict] = []
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+        self._thread.start()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return hasattr(record, "event_type")
+
+    def emit(self, record: logging.LogRecord):
+        row = {
+            "timestamp": datetime.datetime.utcfromtimestamp(record.created),
+            "event_type": record.event_type,
+            "message": record.getMessage(),
+        }
+        with self._pending_lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes all pending events, one transaction per batch."""
+        if database.engine is None:
+            return  # keep events until the database is initialized
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+
+        for first in range(0, len(pending), self.batch_size):
+            batch = pending[first:first + self.batch_size]
+            try:
+                with database.engine.begin() as connection:
+                    connection.execute(Event.__table__.insert(), batch)
+            except Exception as e:
+                # Logging the failure could feed back into this handler
+                print(f"Failed to journal {len(batch)} events: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        super().close()
+
+
+# --- Setup ---
+
+class LoggingPipeline:
+    """
+    The running logging pipeline: the root logger's queue handler and the
+    listener thread with the output handlers.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (LoggingConfig): The logging settings.
+        """
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.queue_handler = NonBlockingQueueHandler(self.queue, config.queue_size)
+        self.queue_handler.addFilter(SubsystemRateLimiter(config.rate_limit_per_s, config.rate_limit_burst))
+
+        formatter = JsonFormatter() if config.format == "json" else TextFormatter()
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(formatter)
+        console.addFilter(_EventLevelFilter())
+        handlers: List[logging.Handler] = [console]
+        if config.file:
+            file_handler = logging.handlers.WatchedFileHandler(config.file)
+            file_handler.setFormatter(JsonFormatter())
+            file_handler.addFilter(_EventLevelFilter())
+            handlers.append(file_handler)
+        self.journal = EventJournal(config.journal_batch_size, config.journal_flush_interval_s)
+        handlers.append(self.journal)
+
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+
+    @property
+    def dropped(self) -> int:
+        """Records lost because the queue or the event journal was full."""
+        return self.queue_handler.dropped + self.journal.dropped
+
+    def start(self, level: str):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        set_level(level)
+        self.listener.start()
+
+    def stop(self):
+        """Detaches from the root logger and drains the queue."""
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def setup_logging(config) -> LoggingPipeline:
+    """
+    Routes all logging through a new non-blocking pipeline, replacing the
+    root logger's handlers and any pipeline started before.
+
+    Args:
+        config (LoggingConfig): The logging settings.
+    """
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+    _pipeline = LoggingPipeline(config)
+    _pipeline.start(config.level)
+    return _pipeline
+
+
+def shutdown_logging():
+    """Flushes and stops the pipeline; later records go to stderr."""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    The multiprocessing context for worker pools. Workers are started from a
+    clean process rather than forked: a fork would copy the logging queue
+    (which nothing drains in the child) and any lock held by another thread
+    at that moment, such as the rate limiter's or SQLite's.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def init_worker_logging(level: int):
+    """
+    Sets up logging in a worker process: records are written straight to
+    stderr in the text format. Call it from the pool's initializer.
+    """
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(TextFormatter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def set_level(level: str):
+    """Changes the level of the root logger and of uvicorn's loggers."""
+    logging.getLogger().setLevel(level)
+    logging.getLogger("uvicorn").setLevel(level)
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+
+
+def record_event(event_type: str, message: str, level: int = logging.INFO, **fields):
+    """
+    Logs an important event and journals it in the `events` table.
+
+    Events are journaled whatever the logging level; the level only decides
+    whether they also appear on the console and in the log file.
+
+    Args:
+        event_type (str): Short event name, e.g. "startup", "pass_captured", "device_error".
+        message (str): Human-readable description.
+        level (int): Logging level of the record.
+        **fields: Extra structured fields for the JSON log line.
+    """
+    root = logging.getLogger()
+    if _pipeline is None:
+        # No journal to write to; behave like any other log call
+        root.log(level, message, extra={"event_type": event_type, **fields}, stacklevel=2)
+        return
+
+    pathname, lineno, func, _ = root.findCaller(False, 2)
+    record = root.makeRecord(
+        root.name, level, pathname, lineno, message, None, None,
+        func=func, extra={"event_type": event_type, **fields},
+    )
+    # Bypasses the logger's level check; the output handlers apply it instead
+    _pipeline.queue_handler.handle(record)
@@ -1,6 +1,6 @@
 import datetime
-from sqlalchemy import (Column, Integer, String, Float, DateTime, JSON,
-                        ForeignKey)
+from sqlalchemy import (Boolean, Column, Integer, String, Float, Date, DateTime, JSON,
+                        ForeignKey, Index, UniqueConstraint, false)
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -35,6 +35,7 @@ class Capture(Base):
 
     # Storing gains as a JSON object for flexibility
     gains = Column(JSON) # e.g., {"lna": 16, "vga": 20}
+    # With AGC, see AutoGainControl.gains_record: also "agc" and the in-capture "changes"
 
     timestamp_start = Column(DateTime, default=datetime.datetime.utcnow)
     timestamp_end = Column(DateTime)
@@ -46,9 +47,43 @@ class Capture(Base):
 
     notes = Column(String, nullable=True)
 
+    # Set once the finished capture is counted in `capture_daily_stats` (see core/queries.py)
+    stats_recorded = Column(Boolean, nullable=False, default=False, server_default=false())
+
     # Relationship to a potential decoded NOAA image
     noaa_image = relationship("NOAAImage", back_populates="capture", uselist=False)
 
+    # Composite indexes backing the time-window and frequency-band queries in core/queries.py
+    __table_args__ = (
+        Index("ix_captures_timestamp_start_mode", "timestamp_start", "mode"),
+        Index("ix_captures_frequency_hz_timestamp_start", "frequency_hz", "timestamp_start"),
+    )
+
+class CaptureDailyStat(Base):
+    """
+    Denormalized daily statistics of finished captures per frequency band and mode.
+    Rows are updated incrementally as captures finish (see core/queries.py),
+    so summaries never have to scan the captures table.
+    """
+    __tablename__ = "capture_daily_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    band_hz = Column(Integer, nullable=False, comment="Lower edge of the frequency band")
+    mode = Column(String, nullable=False)
+
+    capture_count = Column(Integer, nullable=False, default=0)
+    total_duration_s = Column(Float, nullable=False, default=0.0)
+
+    # Sum and count rather than an average so increments stay exact
+    rssi_sum_dbm = Column(Float, nullable=False, default=0.0)
+    rssi_count = Column(Integer, nullable=False, default=0)
+    rssi_max_dbm = Column(Float, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("day", "band_hz", "mode", name="uq_capture_daily_stats_day_band_mode"),
+    )
+
 class NOAAImage(Base):
     """
     Represents a decoded NOAA APT image and its specific metadata.
@@ -68,6 +103,9 @@ class NOAAImage(Base):
     max_elevation = Column(Float)
     azimuth = Column(Float)
 
+    # Signal-to-noise ratio measured while decoding; feeds pass scoring
+    snr_db = Column(Float, nullable=True)
+
     timestamp_decoded = Column(DateTime, default=datetime.datetime.utcnow)
 
     # Establish the one-to-one relationship back to the capture
@@ -0,0 +1,244 @@
+import datetime
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .models import Capture, CaptureDailyStat, NOAAImage
+
+# This module provides the indexed query layer for captures and images.
+#
+# All listing helpers use keyset pagination on (timestamp_start, id): each
+# page ends with a cursor and the next page starts strictly after it, so
+# deep pages cost the same as the first one instead of growing with OFFSET.
+#
+# Importing this module also registers the mapper listeners that keep the
+# `capture_daily_stats` summary table up to date as captures finish. Each
+# capture is counted once, recorded by its `stats_recorded` flag.
+
+# Width of the frequency bands used by the daily statistics
+BAND_WIDTH_HZ = 1_000_000
+
+Cursor = Tuple[datetime.datetime, int]
+
+
+@dataclass
+class Page:
+    """A page of results and the cursor to fetch the next one (None on the last page)."""
+    items: List
+    next_cursor: Optional[str]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    timestamp, row_id = cursor
+    return f"{timestamp.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    timestamp, _, row_id = cursor.rpartition("_")
+    return datetime.datetime.fromisoformat(timestamp), int(row_id)
+
+
+def _paginate(query: Query, cursor: Optional[str], limit: int, key=lambda row: row) -> Page:
+    if cursor:
+        query = query.filter(tuple_(Capture.timestamp_start, Capture.id) > decode_cursor(cursor))
+    rows = query.order_by(Capture.timestamp_start, Capture.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = key(rows[-1])
+        next_cursor = encode_cursor((last.timestamp_start, last.id))
+    return Page(items=rows, next_cursor=next_cursor)
+
+
+# --- Query Helpers ---
+
+def captures_in_window(
+    db: Session,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    mode: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page:
+    """
+    Lists captures that started within [start, end), optionally of one mode.
+    Served by the (timestamp_start, mode) index.
+    """
+    query = db.query(Capture).filter(Capture.timestamp_start >= start, Capture.timestamp_start < end)
+    if mode is not None:
+        query = query.filter(Capture.mode == mode)
+    return _paginate(query, cursor, limit)
+
+
+def captures_in_band(
+    db: Session,
+    freq_min_hz: int,
+    freq_max_hz: int,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    mode: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page:
+    """
+    Lists captures tuned within [freq_min_hz, freq_max_hz], optionally within
+    a time window and of one mode. Served by the (frequency_hz, timestamp_start)
+    index; for a single frequency the index also yields the page order, so no
+    sort is needed.
+    """
+    if freq_min_hz == freq_max_hz:
+        query = db.query(Capture).filter(Capture.frequency_hz == freq_min_hz)
+    else:
+        query = db.query(Capture).filter(Capture.frequency_hz.between(freq_min_hz, freq_max_hz))
+    if start is not None:
+        query = query.filter(Capture.timestamp_start >= start)
+    if end is not None:
+        query = query.filter(Capture.timestamp_start < end)
+    if mode is not None:
+        query = query.filter(Capture.mode == mode)
+    return _paginate(query, cursor, limit)
+
+
+def images_for_satellite(
+    db: Session,
+    satellite_name: str,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Page:
+    """
+    Lists decoded images of one satellite with their captures, in capture order.
+
+    Returns:
+        A Page of (NOAAImage, Capture) tuples.
+    """
+    query = (
+        db.query(NOAAImage, Capture)
+        .join(Capture, NOAAImage.capture_id == Capture.id)
+        .filter(NOAAImage.satellite_name == satellite_name)
+    )
+    if start is not None:
+        query = query.filter(Capture.timestamp_start >= start)
+    if end is not None:
+        query = query.filter(Capture.timestamp_start < end)
+    return _paginate(query, cursor, limit, key=lambda row: row[1])
+
+
+def daily_band_stats(
+    db: Session,
+    start_day: datetime.date,
+    end_day: datetime.date,
+    freq_min_hz: Optional[int] = None,
+    freq_max_hz: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[CaptureDailyStat]:
+    """Returns the daily per-band statistics for the inclusive day range."""
+    query = db.query(CaptureDailyStat).filter(CaptureDailyStat.day.between(start_day, end_day))
+    if freq_min_hz is not None:
+        query = query.filter(CaptureDailyStat.band_hz >= freq_min_hz - freq_min_hz % BAND_WIDTH_HZ)
+    if freq_max_hz is not None:
+        query = query.filter(CaptureDailyStat.band_hz <= freq_max_hz)
+    if mode is not None:
+        query = query.filter(CaptureDailyStat.mode == mode)
+    return query.order_by(CaptureDailyStat.day, CaptureDailyStat.band_hz, CaptureDailyStat.mode).all()
+
+
+# --- Incremental Daily Statistics ---
+
+def _record_finished_capture(connection, capture: Capture):
+    """Adds one finished capture to its day/band/mode statistics row with a single upsert."""
+    if capture.frequency_hz is None or capture.timestamp_start is None:
+        return
+
+    duration_s = 0.0
+    if capture.timestamp_end is not None:
+        duration_s = max((capture.timestamp_end - capture.timestamp_start).total_seconds(), 0.0)
+    has_rssi = capture.rssi_avg_dbm is not None
+
+    table = CaptureDailyStat.__table__
+    stmt = sqlite_insert(table).values(
+        day=capture.timestamp_start.date(),
+        band_hz=capture.frequency_hz - capture.frequency_hz % BAND_WIDTH_HZ,
+        mode=capture.mode or "unknown",
+        capture_count=1,
+        total_duration_s=duration_s,
+        rssi_sum_dbm=capture.rssi_avg_dbm if has_rssi else 0.0,
+        rssi_count=1 if has_rssi else 0,
+        rssi_max_dbm=capture.rssi_avg_dbm,
+    )
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.band_hz, table.c.mode],
+        set_={
+            "capture_count": table.c.capture_count + 1,
+            "total_duration_s": table.c.total_duration_s + excluded.total_duration_s,
+            "rssi_sum_dbm": table.c.rssi_sum_dbm + excluded.rssi_sum_dbm,
+            "rssi_count": table.c.rssi_count + excluded.rssi_count,
+            # SQLite's scalar max() returns NULL if either side is NULL
+            "rssi_max_dbm": func.max(
+                func.coalesce(table.c.rssi_max_dbm, excluded.rssi_max_dbm),
+                func.coalesce(excluded.rssi_max_dbm, table.c.rssi_max_dbm),
+            ),
+        },
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(Capture.timestamp_end, "set", active_history=True)
+def _timestamp_end_set(target, value, oldvalue, initiator):
+    # Registered for `active_history`: the previous end timestamp is loaded even
+    # when the capture was expired by a commit, so `capture_finished` can tell
+    # a capture finishing from one whose end time is being edited
+    pass
+
+
+def capture_finished(target: Capture) -> bool:
+    """
+    True if a flush is setting the end timestamp of a capture that had none.
+    For use in `after_update` listeners. A capture whose end is cleared and
+    set again finishes again, so listeners that must count a capture only
+    once check `Capture.stats_recorded` instead.
+    """
+    history = inspect(target).attrs.timestamp_end.history
+    # A previous value of None is reported either as [None] or, if it was never set, not at all
+    return target.timestamp_end is not None and bool(history.added) and (
+        not history.deleted or history.deleted[0] is None
+    )
+
+
+@event.listens_for(Capture, "before_insert")
+def _capture_inserting(mapper, connection, target):
+    if target.timestamp_end is not None:
+        target.stats_recorded = True
+
+
+@event.listens_for(Capture, "after_insert")
+def _capture_inserted(mapper, connection, target):
+    if target.timestamp_end is not None:
+        _record_finished_capture(connection, target)
+
+
+@event.listens_for(Capture, "after_update")
+def _capture_updated(mapper, connection, target):
+    if not capture_finished(target):
+        return
+    # A capture is counted once: the flag is claimed in the same statement
+    # that checks it, so a capture finishing a second time is skipped
+    claimed = connection.execute(
+        update(Capture.__table__)
+        .where(Capture.id == target.id, Capture.stats_recorded.is_(False))
+        .values(stats_recorded=True)
+    ).rowcount
+    if claimed:
+        set_committed_value(target, "stats_recorded", True)
+        _record_finished_capture(connection, target)
@@ -0,0 +1,243 @@
+import datetime
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sdr.agc import AutoGainControl
+from storage.occupancy import OccupancyIndex
+from storage.tier import StorageTier
+
+from .config import AppConfig, read_config
+from .log import set_level, setup_logging
+
+# This module reloads the configuration file while the service runs.
+#
+# A watcher thread polls the file's modification time and size. Once a change
+# has been stable for one poll, the file is validated into a new AppConfig
+# and compared with the running one section by section. Only the components
+# of changed sections are touched:
+#   station(s), noaa.min_elevation_deg, tracking   pass predictor (drops only
+#                                                   the affected schedules)
+#   noaa TLE source                                 TLE manager
+#   sdr                                             tuning, gains/AGC; RX keeps streaming
+#   logging, stream, storage, occupancy             their components
+#   idle_scan, reload                               read from the config directly
+#   data_paths                                      kept; needs a restart
+#
+# The watcher thread always runs but only polls while `reload.enabled` is
+# set, so turning it off takes effect on the next poll and turning it back on
+# takes one explicit reload.
+#
+# All changes are applied under one lock. If any step fails, that step and
+# the steps already applied are reverted and the running configuration is
+# kept, so the service never runs on half of a configuration. Each step works
+# from the live components rather than assuming it completed, so reverting a
+# step that failed halfway restores what it had already changed.
+
+# Sections whose changes are only applied by a restart
+RESTART_SECTIONS = ("data_paths",)
+
+
+class ConfigReloader:
+    """
+    Watches the configuration file and applies changes to the running application.
+    """
+
+    def __init__(self, state, path: Path):
+        """
+        Args:
+            state: The application state (`app.state`) holding the config and components.
+            path (Path): The configuration file.
+        """
+        self.state = state
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = self._file_signature()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-reload", daemon=True)
+        self._thread.start()
+        if self.state.config.reload.enabled:
+            logging.info(f"Watching '{self.path}' for configuration changes.")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self):
+        pending = None
+        while not self._stop.wait(self.state.config.reload.poll_interval_s):
+            if not self.state.config.reload.enabled:
+                # Re-enabling takes an explicit reload (POST /config/reload)
+                pending = None
+                continue
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                pending = None
+                continue
+            if signature != pending:
+                # Wait one more poll so a file still being written is not read
+                pending = signature
+                continue
+
+            pending = None
+            self._signature = signature
+            try:
+                self.reload()
+            except Exception as e:
+                logging.error(f"Configuration change in '{self.path}' was not applied: {e}")
+
+    # --- Applying Changes ---
+
+    def reload(self) -> Dict[str, List[str]]:
+        """
+        Validates the configuration file and applies what changed.
+
+        Returns:
+            A dictionary with the "applied" sections and those that
+            "require_restart".
+
+        Raises:
+            OSError, ValueError: If the file cannot be read or is invalid.
+            Exception: Any error of a component; all changes are then reverted.
+        """
+        with self._lock:
+            self._signature = self._file_signature()
+            old = self.state.config
+            new = read_config(self.path)
+
+            changed = [name for name in AppConfig.__fields__ if getattr(old, name) != getattr(new, name)]
+            restart = [name for name in changed if name in RESTART_SECTIONS]
+            if restart:
+                logging.warning(f"Configuration sections {restart} changed; they take effect after a restart.")
+                new = new.copy(update={name: getattr(old, name) for name in restart})
+
+            steps = [step for sections, step in self._steps() if any(name in changed for name in sections)]
+            applied: List[Callable] = []
+            try:
+                for step in steps:
+                    # Recorded first, so a step failing halfway is reverted too
+                    applied.append(step)
+                    step(old, new)
+            except Exception:
+                logging.error("Applying the new configuration failed; reverting to the running one.", exc_info=True)
+                for step in reversed(applied):
+                    try:
+                        step(new, old)
+                    except Exception as e:
+                        logging.error(f"Could not revert {step.__name__}: {e}")
+                raise
+
+            self.state.config = new
+            applied_sections = [name for name in changed if name not in restart]
+            if applied_sections:
+                logging.info(f"Configuration reloaded; applied changes to {applied_sections}.")
+            return {"applied": applied_sections, "require_restart": restart}
+
+    def _steps(self) -> List[Tuple[Tuple[str, ...], Callable[[AppConfig, AppConfig], None]]]:
+        """The update steps in application order, with the sections that trigger them."""
+        return [
+            (("logging",), self._apply_logging),
+            (("station", "stations", "noaa", "tracking"), self._apply_tracking),
+            (("sdr",), self._apply_sdr),
+            (("stream",), self._apply_stream),
+            (("storage",), self._apply_storage),
+            (("occupancy",), self._apply_occupancy),
+        ]
+
+    def _apply_logging(self, old: AppConfig, new: AppConfig):
+        if old.logging.copy(update={"level": new.logging.level}) == new.logging:
+            set_level(new.logging.level)
+        else:
+            self.state.logging = setup_logging(new.logging)
+
+    def _apply_tracking(self, old: AppConfig, new: AppConfig):
+        tle_manager = getattr(self.state, "tle_manager", None)
+        if tle_manager is not None:
+            tle_manager.tle_url = str(new.noaa.tle_url)
+            tle_manager.cache_duration = datetime.timedelta(days=new.noaa.tle_cache_days)
+
+        predictor = getattr(self.state, "pass_predictor", None)
+        if predictor is None:
+            return
+        affected = predictor.reconfigure(new)
+        if affected:
+            logging.info(f"Dropped the cached pass schedules of stations {affected}.")
+        if predictor.scorer is not None and old.tracking.scoring != new.tracking.scoring:
+            predictor.scorer.configure(new)
+            predictor.rescore()
+
+    def _apply_sdr(self, old: AppConfig, new: AppConfig):
+        sdr_device = getattr(self.state, "sdr_device", None)
+        if sdr_device is None:
+            return
+        gains_changed = (old.sdr.gain_lna, old.sdr.gain_vga) != (new.sdr.gain_lna, new.sdr.gain_vga)
+        if new.sdr.sample_rate_hz != old.sdr.sample_rate_hz:
+            sdr_device.set_sample_rate(new.sdr.sample_rate_hz)
+        if new.sdr.center_freq_hz != old.sdr.center_freq_hz:
+            sdr_device.set_frequency(new.sdr.center_freq_hz)
+
+        agc = getattr(self.state, "agc", None)
+        if agc is not None and not new.sdr.agc.enabled:
+            agc.stop()
+            self.state.agc = agc = None
+            gains_changed = True  # back to the fixed gains
+        elif agc is None and new.sdr.agc.enabled:
+            self.state.agc = AutoGainControl(sdr_device, new.sdr)
+            self.state.agc.start()
+            return
+
+        if agc is not None:
+            agc.reconfigure(new.sdr, reset_gains=gains_changed)
+        elif gains_changed:
+            sdr_device.set_lna_gain(new.sdr.gain_lna)
+            sdr_device.set_vga_gain(new.sdr.gain_vga)
+
+    def _apply_stream(self, old: AppConfig, new: AppConfig):
+        broadcaster = getattr(self.state, "spectrum_broadcaster", None)
+        if broadcaster is not None:
+            broadcaster.config = new.stream
+
+    def _apply_storage(self, old: AppConfig, new: AppConfig):
+        tier = getattr(self.state, "storage_tier", None)
+        if tier is not None and old.storage.workers == new.storage.workers and new.storage.enabled:
+            tier.config = new.storage
+            return
+
+        # Enabling, disabling or resizing the worker pool restarts the tier
+        if tier is not None:
+            tier.stop()
+            self.state.storage_tier = None
+        if new.storage.enabled:
+            self.state.storage_tier = StorageTier(new)
+            self.state.storage_tier.start()
+
+    def _apply_occupancy(self, old: AppConfig, new: AppConfig):
+        index = getattr(self.state, "occupancy_index", None)
+        geometry = ("freq_min_hz", "freq_max_hz", "bin_hz", "bucket_s", "retention_days")
+        same_geometry = all(getattr(old.occupancy, f) == getattr(new.occupancy, f) for f in geometry)
+        if index is not None and same_geometry and new.occupancy.enabled:
+            index.config = new.occupancy
+            return
+
+        # A new geometry rebuilds the index
+        if index is not None:
+            index.stop()
+            self.state.occupancy_index = None
+        if new.occupancy.enabled:
+            self.state.occupancy_index = OccupancyIndex(new.data_paths.occupancy, new.occupancy)
+            self.state.occupancy_index.start()
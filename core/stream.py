@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import struct
+import uuid
+from typing import Optional, Set
+
+import numpy as np
+
+from sdr.spectrum import decimate_bins, power_spectrum_db, quantize_db
+
+# This module fans live SDR data out to WebSocket clients. One spectrum frame
+# is computed per tick no matter how many clients are connected, and every
+# client gets its own bounded queue: a slow client loses its oldest frames
+# instead of making the server buffer without limit.
+#
+# Frames are compact little-endian binary messages:
+#   spectrum: header SPECTRUM_HEADER followed by `bin count` uint8 values,
+#             each mapping linearly onto [dB floor, dB ceiling].
+#   progress: header PROGRESS_HEADER followed by `row count * row width`
+#             uint8 pixels of the most recently decoded APT rows.
+
+FRAME_SPECTRUM = 1
+FRAME_PROGRESS = 2
+
+# frame type, bin count, center Hz, sample rate Hz, dB floor, dB ceiling
+SPECTRUM_HEADER = struct.Struct("<BxHQIff")
+# frame type, APT row count, APT row width, capture UUID, bytes written, RSSI dBm
+PROGRESS_HEADER = struct.Struct("<BxHH16sQf")
+
+
+def encode_spectrum_frame(levels: np.ndarray, center_freq_hz: int, sample_rate_hz: int,
+                          db_min: float, db_max: float) -> bytes:
+    """Packs a quantized spectrum into a binary frame."""
+    header = SPECTRUM_HEADER.pack(
+        FRAME_SPECTRUM, levels.size, center_freq_hz, sample_rate_hz, db_min, db_max
+    )
+    return header + levels.tobytes()
+
+
+def encode_progress_frame(capture_uuid: str, bytes_written: int, rssi_dbm: float,
+                          apt_rows: Optional[np.ndarray] = None) -> bytes:
+    """Packs capture progress and optional partial APT image rows into a binary frame."""
+    if apt_rows is None:
+        apt_rows = np.empty((0, 0), dtype=np.uint8)
+    apt_rows = np.atleast_2d(np.asarray(apt_rows, dtype=np.uint8))
+    header = PROGRESS_HEADER.pack(
+        FRAME_PROGRESS, apt_rows.shape[0], apt_rows.shape[1],
+        uuid.UUID(capture_uuid).bytes, bytes_written, rssi_dbm,
+    )
+    return header + apt_rows.tobytes()
+
+
+class SpectrumBroadcaster:
+    """
+    Computes spectrum frames from the SDR's RX ring buffer and publishes them,
+    together with capture progress, to any number of subscribers.
+    """
+
+    def __init__(self, sdr_device, config):
+        """
+        Args:
+            sdr_device (HackRF | None): The SDR whose `rx_ring` is displayed.
+            config (StreamConfig): The stream settings.
+        """
+        self.sdr_device = sdr_device
+        self.config = config
+        self.dropped_frames = 0
+        self._clients: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    async def start(self):
+        """Starts the periodic spectrum task on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the spectrum task."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Registers a new client and returns the queue its frames are delivered to."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.config.client_queue_frames)
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._clients.discard(queue)
+
+    def publish_progress(self, capture_uuid: str, bytes_written: int, rssi_dbm: float,
+                         apt_rows: Optional[np.ndarray] = None):
+        """
+        Publishes capture progress. Safe to call from capture and decode threads;
+        the frame is encoded by the caller and handed to the event loop.
+        """
+        if not self._clients or self._loop is None:
+            return
+        frame = encode_progress_frame(capture_uuid, bytes_written, rssi_dbm, apt_rows)
+        self._loop.call_soon_threadsafe(self._fan_out, frame)
+
+    def _fan_out(self, frame: bytes):
+        """Delivers one frame to every client, dropping the oldest frame of full queues."""
+        for queue in list(self._clients):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_frames += 1
+            queue.put_nowait(frame)
+
+    def _compute_spectrum_frame(self) -> Optional[bytes]:
+        device = self.sdr_device
+        if device is None or not device.is_open:
+            return None
+
+        cfg = self.config
+        # Average no more FFTs than the RX ring holds
+        averages = max(1, min(cfg.averages, device.rx_ring.capacity // (2 * cfg.fft_size)))
+        samples = device.rx_ring.latest(2 * cfg.fft_size * averages)
+        if samples is None:
+            return None
+
+        power_db = decimate_bins(power_spectrum_db(samples, cfg.fft_size, averages), cfg.bins)
+        levels = quantize_db(power_db, cfg.db_min, cfg.db_max)
+        return encode_spectrum_frame(
+            levels, device.center_freq_hz or 0, device.sample_rate_hz or 0, cfg.db_min, cfg.db_max
+        )
+
+    async def _run(self):
+        last_total = -1
+        while True:
+            # Read on every frame so a reloaded configuration takes effect immediately
+            await asyncio.sleep(1.0 / self.config.fps)
+            if not self._clients or self.sdr_device is None:
+                continue
+
+            # Skip the FFT entirely when no new samples have arrived
+            total = self.sdr_device.rx_ring.total_written
+            if total == last_total:
+                continue
+            last_total = total
+
+            try:
+                frame = self._compute_spectrum_frame()
+            except Exception as e:
+                logging.error(f"Failed to compute spectrum frame: {e}")
+                continue
+            if frame is not None:
+                self._fan_out(frame)
@@ -0,0 +1,350 @@
+import collections
+import datetime
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+# This module provides automatic gain control for the HackRF.
+#
+# Every new stretch of the RX ring is cut into fixed-size blocks and two
+# statistics are computed for all blocks at once: the fraction of I/Q values
+# at int8 full scale (clipping) and the RMS power in dBFS. A hysteresis
+# controller turns them into LNA/VGA settings between blocks:
+#   - clipping, or a level above the target band, lowers the gain;
+#   - a level below the target band raises it;
+#   - a change needs `trigger_blocks` consecutive blocks agreeing on it, and
+#     after a change `holdoff_blocks` are ignored while samples taken with
+#     the old gains drain from the pipeline,
+# so noise around the band edges does not make the settings thrash.
+#
+# `calibrate` runs the same decision without hysteresis on short captures,
+# so a recording can start at converged gains.
+
+# HackRF gain stages: the LNA in 8 dB steps, the baseband VGA in 2 dB steps
+LNA_STEP_DB = 8
+LNA_MAX_DB = 40
+VGA_STEP_DB = 2
+VGA_MAX_DB = 62
+MAX_GAIN_DB = LNA_MAX_DB + VGA_MAX_DB
+
+# int8 values at or beyond this magnitude are counted as clipped
+CLIP_LEVEL = 127
+
+
+def block_stats(iq_int8: np.ndarray, block_bytes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the clip ratio and RMS power of consecutive blocks of I/Q bytes.
+    A trailing partial block is ignored.
+
+    Args:
+        iq_int8 (np.ndarray): Interleaved int8 I/Q bytes.
+        block_bytes (int): Bytes per block (two per complex sample).
+
+    Returns:
+        A tuple of the fraction of clipped I/Q values and the mean power in
+        dBFS (as `rssi_dbfs`) of each block.
+    """
+    n_blocks = iq_int8.size // block_bytes
+    blocks = iq_int8[:n_blocks * block_bytes].reshape(n_blocks, block_bytes)
+
+    clipped = np.count_nonzero((blocks >= CLIP_LEVEL) | (blocks <= -CLIP_LEVEL), axis=1)
+    energy = np.einsum("ij,ij->i", blocks, blocks, dtype=np.int64)
+
+    clip_ratio = clipped / block_bytes
+    mean_power = energy / (128.0 * 128.0 * (block_bytes // 2))
+    return clip_ratio, 10.0 * np.log10(mean_power + 1e-20)
+
+
+def split_gain(total_db: int, vga_floor_db: int) -> Tuple[int, int]:
+    """
+    Distributes a total gain over the two stages. The VGA takes the first
+    `vga_floor_db`, then the LNA rises in 8 dB steps (best noise figure) and
+    the VGA makes up the remainder.
+
+    Returns:
+        A tuple of (LNA gain, VGA gain) in dB.
+    """
+    total_db = int(np.clip(total_db, 0, MAX_GAIN_DB))
+    lna = min(LNA_MAX_DB, max(0, total_db - vga_floor_db) // LNA_STEP_DB * LNA_STEP_DB)
+    vga = min(VGA_MAX_DB, (total_db - lna) // VGA_STEP_DB * VGA_STEP_DB)
+    return lna, vga
+
+
+class GainController:
+    """
+    The hysteresis decision logic of the AGC, independent of any device.
+    """
+
+    def __init__(self, config, lna_db: int, vga_db: int):
+        """
+        Args:
+            config (AgcConfig): The AGC settings.
+            lna_db (int): The current LNA gain.
+            vga_db (int): The current VGA gain.
+        """
+        self.config = config
+        self.lna_db = lna_db
+        self.vga_db = vga_db
+        self._direction = 0
+        self._count = 0
+        self._holdoff = 0
+
+    def correction(self, clip_ratio: float, rms_dbfs: float) -> int:
+        """
+        Returns the gain change in dB one block's statistics call for,
+        or 0 if the block is within the target band.
+        """
+        cfg = self.config
+        if clip_ratio > cfg.max_clip_ratio:
+            # The RMS of a clipped block underestimates the true level
+            return -cfg.max_step_db
+        error = cfg.target_rms_dbfs - rms_dbfs
+        if abs(error) <= cfg.deadband_db:
+            return 0
+        step = int(np.clip(round(error), -cfg.max_step_db, cfg.max_step_db))
+        return step if abs(step) >= VGA_STEP_DB else int(np.sign(error)) * VGA_STEP_DB
+
+    def step(self, step_db: int) -> Optional[Tuple[int, int]]:
+        """
+        Applies a gain change to the current settings, keeping the total gain
+        within the hardware limits.
+
+        Returns:
+            The new (LNA, VGA) gains, or None if they did not change.
+        """
+        gains = split_gain(self.lna_db + self.vga_db + step_db, self.config.vga_floor_db)
+        if gains == (self.lna_db, self.vga_db):
+            return None
+        self.lna_db, self.vga_db = gains
+        return gains
+
+    def update(self, clip_ratio: np.ndarray, rms_dbfs: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        Feeds the statistics of consecutive blocks through the hysteresis.
+
+        Returns:
+            The new (LNA, VGA) gains if a change is due, otherwise None.
+            Blocks after a change are dropped; they were taken with the old gains.
+        """
+        for clip, rms in zip(clip_ratio.tolist(), rms_dbfs.tolist()):
+            if self._holdoff > 0:
+                self._holdoff -= 1
+                continue
+
+            step_db = self.correction(clip, rms)
+            direction = int(np.sign(step_db))
+            if direction == 0 or direction != self._direction:
+                self._count = 0
+            self._direction = direction
+            if direction == 0:
+                continue
+
+            self._count += 1
+            if self._count < self.config.trigger_blocks:
+                continue
+
+            self._count = 0
+            gains = self.step(step_db)
+            if gains is not None:
+                self._holdoff = self.config.holdoff_blocks
+                self._direction = 0
+                return gains
+        return None
+
+
+class AutoGainControl:
+    """
+    Runs the gain control loop on the RX ring of a HackRF and keeps a history
+    of the gains it chose, for recording in `Capture.gains`.
+    """
+
+    def __init__(self, sdr_device, config, history_size: int = 1024):
+        """
+        Args:
+            sdr_device (HackRF): The SDR whose gains are controlled.
+            config (SdrConfig): The SDR settings; the fixed gains are the starting point.
+            history_size (int): Number of gain changes remembered.
+        """
+        self.sdr_device = sdr_device
+        self.config = config.agc
+        self.controller = GainController(config.agc, config.gain_lna, config.gain_vga)
+        self.block_bytes = 2 * config.agc.block_samples
+        self.last_clip_ratio: Optional[float] = None
+        self.last_rms_dbfs: Optional[float] = None
+        # (UTC time, lna, vga) of every applied setting, oldest first
+        self._history = collections.deque(maxlen=history_size)
+        self._read_total = 0
+        self._lock = threading.Lock()
+        self._calibrating = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reconfigure(self, config, reset_gains: bool = False):
+        """
+        Takes new AGC settings without interrupting the loop.
+
+        Args:
+            config (SdrConfig): The new SDR settings.
+            reset_gains (bool): Restart the loop from the configured fixed gains,
+                e.g. because they were changed.
+        """
+        with self._lock:
+            self.config = config.agc
+            self.controller.config = config.agc
+            self.block_bytes = 2 * config.agc.block_samples
+            if reset_gains:
+                self.controller.lna_db, self.controller.vga_db = config.gain_lna, config.gain_vga
+                self._apply(config.gain_lna, config.gain_vga)
+
+    def start(self):
+        """Applies the starting gains and starts the control thread."""
+        self._apply(self.controller.lna_db, self.controller.vga_db)
+        self._read_total = self.sdr_device.rx_ring.total_written
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sdr-agc", daemon=True)
+        self._thread.start()
+        logging.info(
+            f"AGC started at LNA {self.controller.lna_db} dB, VGA {self.controller.vga_db} dB "
+            f"(target {self.config.target_rms_dbfs:.0f} dBFS)."
+        )
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.config.interval_s):
+            try:
+                self.process_new_samples()
+            except Exception as e:
+                logging.error(f"AGC update failed: {e}")
+
+    def process_new_samples(self) -> Optional[Tuple[int, int]]:
+        """
+        Evaluates the blocks received since the last call and applies a gain
+        change if the controller calls for one.
+
+        Returns:
+            The new (LNA, VGA) gains if they were changed, otherwise None.
+        """
+        ring = self.sdr_device.rx_ring
+        total = ring.total_written
+        if self._calibrating.is_set():
+            return None  # calibration owns the gains and resets the read position
+        n_blocks = min(total - self._read_total, ring.capacity) // self.block_bytes
+        if n_blocks == 0:
+            return None
+
+        samples = ring.latest(n_blocks * self.block_bytes)
+        self._read_total = total
+        if samples is None:
+            return None
+
+        clip_ratio, rms_dbfs = block_stats(samples, self.block_bytes)
+        self.last_clip_ratio = float(clip_ratio[-1])
+        self.last_rms_dbfs = float(rms_dbfs[-1])
+
+        with self._lock:
+            gains = self.controller.update(clip_ratio, rms_dbfs)
+            if gains is not None:
+                self._apply(*gains)
+                # Anything already buffered was received with the old gains
+                self._read_total = ring.total_written
+        return gains
+
+    def calibrate(self, max_rounds: int = 6, timeout_s: float = 2.0) -> Tuple[int, int]:
+        """
+        Pre-pass before a recording: takes short calibration captures from the
+        running RX stream and adjusts the gains without hysteresis until the
+        level is in the target band and nothing clips.
+
+        Args:
+            max_rounds (int): Maximum number of calibration captures.
+            timeout_s (float): How long to wait for each capture.
+
+        Returns:
+            The chosen (LNA, VGA) gains.
+        """
+        sample_rate = self.sdr_device.sample_rate_hz or 2_000_000
+        n_bytes = max(int(self.config.calibration_s * sample_rate) * 2, self.block_bytes)
+        n_bytes = min(n_bytes - n_bytes % self.block_bytes, self.sdr_device.rx_ring.capacity)
+
+        # The control loop pauses meanwhile; the lock is only taken around gain
+        # changes so readers such as gains_record() never wait for samples
+        self._calibrating.set()
+        try:
+            for _ in range(max_rounds):
+                samples = self._wait_for_samples(n_bytes, timeout_s)
+                if samples is None:
+                    logging.warning("AGC calibration timed out waiting for RX samples.")
+                    break
+
+                clip_ratio, rms_dbfs = block_stats(samples, self.block_bytes)
+                self.last_clip_ratio = float(clip_ratio.max())
+                self.last_rms_dbfs = float(np.median(rms_dbfs))
+                step_db = self.controller.correction(self.last_clip_ratio, self.last_rms_dbfs)
+                if step_db == 0:
+                    break
+                with self._lock:
+                    gains = self.controller.step(step_db)
+                    if gains is not None:
+                        self._apply(*gains)
+                if gains is None:
+                    break  # already at the limit of the hardware
+        finally:
+            self._read_total = self.sdr_device.rx_ring.total_written
+            self._calibrating.clear()
+
+        with self._lock:
+            lna_db, vga_db = self.controller.lna_db, self.controller.vga_db
+        level = (f" ({self.last_rms_dbfs:.1f} dBFS, clip ratio {self.last_clip_ratio:.2e})"
+                 if self.last_rms_dbfs is not None else "")
+        logging.info(f"AGC calibrated to LNA {lna_db} dB, VGA {vga_db} dB{level}.")
+        return lna_db, vga_db
+
+    def _wait_for_samples(self, n_bytes: int, timeout_s: float) -> Optional[np.ndarray]:
+        """Returns the next `n_bytes` received after this call, or None on timeout."""
+        ring = self.sdr_device.rx_ring
+        # Skip one block so samples in flight with the previous gains are not used
+        wanted = ring.total_written + self.block_bytes + n_bytes
+        deadline = time.monotonic() + timeout_s
+        while ring.total_written < wanted:
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(0.005)
+        return ring.latest(n_bytes)
+
+    def _apply(self, lna_db: int, vga_db: int):
+        self.sdr_device.set_lna_gain(lna_db)
+        self.sdr_device.set_vga_gain(vga_db)
+        self._history.append((datetime.datetime.utcnow(), lna_db, vga_db))
+        logging.debug(f"AGC set LNA {lna_db} dB, VGA {vga_db} dB")
+
+    def gains_record(self, since: Optional[datetime.datetime] = None) -> dict:
+        """
+        Builds the `Capture.gains` record of a capture.
+
+        Args:
+            since (datetime.datetime, optional): Capture start (naive UTC, like
+                `Capture.timestamp_start`); gain changes from then on are listed.
+
+        Returns:
+            A dictionary with the current "lna" and "vga" gains, "agc": True and
+            the "changes" made during the capture as [ISO time, lna, vga] entries.
+        """
+        with self._lock:
+            history = list(self._history)
+        return {
+            "lna": self.controller.lna_db,
+            "vga": self.controller.vga_db,
+            "agc": True,
+            "changes": [
+                [at.isoformat(), lna, vga] for at, lna, vga in history
+                if since is None or at >= since
+            ],
+        }
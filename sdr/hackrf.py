@@ -1,5 +1,9 @@
 import logging
 
+from core.log import record_event
+
+from .ring import RingBuffer
+
 # This module provides a resilient wrapper for the HackRF SDR.
 # It attempts to import the necessary libraries but falls back to a "dummy" class
 # if the drivers are not installed. This allows the application to run
@@ -26,9 +30,17 @@ class HackRF:
     If the necessary drivers are not found, it acts as a dummy interface
     that prevents the application from crashing.
     """
-    def __init__(self):
+    def __init__(self, ring_size_bytes: int = 1 << 22):
         self.device: PyHackRF | None = None
         self.is_open = False
+        self.center_freq_hz: int | None = None
+        self.sample_rate_hz: int | None = None
+        self.lna_gain_db: int | None = None
+        self.vga_gain_db: int | None = None
+        # The most recent RX samples, shared with the spectrum stream
+        self.rx_ring = RingBuffer(ring_size_bytes)
+        self.is_streaming = False
+        self._rx_callback = None
         if not HACKRF_ENABLED:
             logging.info("HackRF is disabled (drivers not found).")
 
@@ -51,7 +63,7 @@ class HackRF:
         except HackRFError as e:
             # This error means the library is present, but the device is not connected
             # or there's a permission issue.
-            logging.error(f"Failed to open HackRF device: {e}")
+            record_event("device_error", f"Failed to open HackRF device: {e}", level=logging.ERROR)
             self.device = None
             self.is_open = False
             return False
@@ -59,6 +71,7 @@ class HackRF:
     def close(self):
         """Closes the connection to the HackRF One device."""
         if self.device and self.is_open:
+            self.stop_rx_stream()
             logging.info("Closing HackRF device.")
             self.device.close()
         self.device = None
@@ -72,33 +85,49 @@ class HackRF:
         self._check_open()
         logging.debug(f"Setting center frequency to {freq_hz / 1e6:.2f} MHz")
         self.device.center_freq = freq_hz
+        self.center_freq_hz = freq_hz
 
     def set_sample_rate(self, sample_rate_hz: int):
         self._check_open()
         logging.debug(f"Setting sample rate to {sample_rate_hz / 1e6:.2f} MHz")
         self.device.sample_rate = sample_rate_hz
+        self.sample_rate_hz = sample_rate_hz
 
     def set_lna_gain(self, gain_db: int):
         self._check_open()
         logging.debug(f"Setting LNA gain to {gain_db} dB")
         self.device.lna_gain = gain_db
+        self.lna_gain_db = gain_db
 
     def set_vga_gain(self, gain_db: int):
         self._check_open()
         logging.debug(f"Setting VGA gain to {gain_db} dB")
         self.device.vga_gain = gain_db
+        self.vga_gain_db = gain_db
 
-    def start_rx_stream(self, callback):
+    def start_rx_stream(self, callback=None):
+        """
+        Starts streaming samples from the device. Every block is copied into
+        `rx_ring` before being handed to the optional callback.
+        """
         self._check_open()
         logging.info("Starting RX stream...")
-        # self.device.start_rx(callback) # To be implemented
-        pass
+        self._rx_callback = callback
+        self.device.start_rx(self._on_rx)
+        self.is_streaming = True
+
+    def _on_rx(self, buffer, *args):
+        """Receives raw interleaved I/Q bytes from the driver's transfer thread."""
+        self.rx_ring.write(buffer)
+        if self._rx_callback is not None:
+            self._rx_callback(buffer)
 
     def stop_rx_stream(self):
-        if not self.is_open or not self.device: return
+        if not self.is_open or not self.device or not self.is_streaming: return
         logging.info("Stopping RX stream...")
-        # self.device.stop_rx() # To be implemented
-        pass
+        self.device.stop_rx()
+        self.is_streaming = False
+        self._rx_callback = None
 
     def __enter__(self):
         self.open()
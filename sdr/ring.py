@@ -0,0 +1,64 @@
+import threading
+from typing import Optional
+
+import numpy as np
+
+# This module provides the RX ring buffer shared by the SDR stream and its
+# consumers. The HackRF delivers interleaved 8-bit I/Q bytes; the ring keeps
+# only the most recent window of them so readers (spectrum display, AGC)
+# never hold up the USB transfer callback.
+
+
+class RingBuffer:
+    """
+    A fixed-size, thread-safe ring of interleaved int8 I/Q bytes.
+    Writers never block on readers; old data is simply overwritten.
+    """
+
+    def __init__(self, capacity_bytes: int = 1 << 22):
+        """
+        Args:
+            capacity_bytes (int): Size of the ring in bytes (two per complex sample).
+        """
+        if capacity_bytes <= 0 or capacity_bytes % 2:
+            raise ValueError("Ring capacity must be a positive, even number of bytes.")
+        self.capacity = capacity_bytes
+        self._buffer = np.zeros(capacity_bytes, dtype=np.int8)
+        self._total_written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_written(self) -> int:
+        """Total number of bytes written since creation; useful to detect new data."""
+        return self._total_written
+
+    def write(self, data) -> None:
+        """Appends a block of raw I/Q bytes (bytes-like or int8/uint8 array)."""
+        block = np.frombuffer(data, dtype=np.int8) if not isinstance(data, np.ndarray) else data.view(np.int8).ravel()
+        length = block.size
+        if length > self.capacity:
+            block = block[-self.capacity:]
+
+        with self._lock:
+            start = (self._total_written + length - block.size) % self.capacity
+            first = min(block.size, self.capacity - start)
+            self._buffer[start:start + first] = block[:first]
+            self._buffer[:block.size - first] = block[first:]
+            self._total_written += length
+
+    def latest(self, n_bytes: int) -> Optional[np.ndarray]:
+        """
+        Returns a copy of the most recent `n_bytes` bytes in chronological order,
+        or None if fewer than that have been written so far.
+        """
+        n_bytes -= n_bytes % 2
+        if n_bytes <= 0 or n_bytes > self.capacity:
+            raise ValueError(f"Can only read between 2 and {self.capacity} bytes.")
+
+        with self._lock:
+            if self._total_written < n_bytes:
+                return None
+            end = self._total_written % self.capacity
+            if end >= n_bytes:
+                return self._buffer[end - n_bytes:end].copy()
+            return np.concatenate((self._buffer[end - n_bytes:], self._buffer[:end]))
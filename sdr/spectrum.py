@@ -0,0 +1,65 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Vectorized helpers to turn raw int8 I/Q blocks into power spectra and
+# compact, display-ready frames.
+
+
+@lru_cache(maxsize=8)
+def _window(fft_size: int) -> np.ndarray:
+    return np.hanning(fft_size).astype(np.float32)
+
+
+def iq_to_complex(iq_int8: np.ndarray) -> np.ndarray:
+    """Converts interleaved int8 I/Q bytes to normalized complex64 samples."""
+    return (iq_int8[:iq_int8.size - iq_int8.size % 2].astype(np.float32) / 128.0).view(np.complex64)
+
+
+def power_spectrum_db(iq_int8: np.ndarray, fft_size: int, averages: int = 1) -> np.ndarray:
+    """
+    Computes an averaged power spectrum in dBFS, centered on DC.
+
+    Args:
+        iq_int8 (np.ndarray): Interleaved I/Q bytes; needs 2 * fft_size * averages of them.
+        fft_size (int): Number of FFT bins.
+        averages (int): Number of consecutive FFTs averaged together.
+
+    Returns:
+        A float32 array of `fft_size` power values in dBFS.
+    """
+    samples = iq_to_complex(iq_int8[-2 * fft_size * averages:])
+    window = _window(fft_size)
+    blocks = samples.reshape(averages, fft_size) * window
+
+    spectrum = np.fft.fft(blocks, axis=1)
+    power = np.mean(spectrum.real ** 2 + spectrum.imag ** 2, axis=0)
+    power /= float(np.sum(window) ** 2)
+
+    return np.fft.fftshift(10.0 * np.log10(power + 1e-20)).astype(np.float32)
+
+
+def decimate_bins(power_db: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    Reduces a spectrum to `n_bins` by keeping the peak of each group of bins,
+    so narrow carriers stay visible after decimation. When `n_bins` does not
+    divide the spectrum, groups differ in size by one bin so the whole span
+    is still covered.
+    """
+    if power_db.size <= n_bins:
+        return power_db
+    starts = (np.arange(n_bins) * power_db.size) // n_bins
+    return np.maximum.reduceat(power_db, starts)
+
+
+def quantize_db(power_db: np.ndarray, db_min: float, db_max: float) -> np.ndarray:
+    """Maps dB values linearly onto uint8, clipping to the [db_min, db_max] range."""
+    scaled = (power_db - db_min) * (255.0 / (db_max - db_min))
+    return np.clip(scaled, 0, 255).astype(np.uint8)
+
+
+def rssi_dbfs(iq_int8: np.ndarray) -> float:
+    """Returns the mean power of a block of I/Q bytes in dBFS."""
+    samples = iq_int8.astype(np.float32) / 128.0
+    mean_power = float(np.dot(samples, samples)) / max(samples.size // 2, 1)
+    return 10.0 * np.log10(mean_power + 1e-20)
@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import numpy as np
+
+# This module collects the simulator's measurements: counters and wall-clock
+# latency samples of each pipeline stage, summarized as percentiles and
+# log-scale histograms.
+
+# Histogram bucket edges in seconds: 10 us to 10 s, four buckets per decade
+BUCKET_EDGES_S = 10.0 ** np.arange(-5.0, 1.25, 0.25)
+
+
+class Metrics:
+    """Counters and latency samples of one simulation run."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.latencies: Dict[str, List[float]] = {}
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name: str, seconds: float):
+        self.latencies.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def timed(self, name: str):
+        """Records the wall-clock time spent in the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns count, p50, p90, p99 and max in milliseconds for every stage."""
+        summary = {}
+        for name, samples in sorted(self.latencies.items()):
+            values = np.asarray(samples) * 1000.0
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            summary[name] = {
+                "count": int(values.size),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return summary
+
+    def histogram_lines(self, name: str, width: int = 40) -> List[str]:
+        """Renders the latency histogram of one stage as text lines."""
+        counts, edges = np.histogram(self.latencies.get(name, []), bins=BUCKET_EDGES_S)
+        used = np.flatnonzero(counts)
+        if used.size == 0:
+            return []
+        peak = counts.max()
+        lines = []
+        for i in range(used[0], used[-1] + 1):
+            bar = "#" * int(round(width * counts[i] / peak))
+            lines.append(f"    {_format_s(edges[i]):>8} - {_format_s(edges[i + 1]):<8} {counts[i]:>8} {bar}")
+        return lines
+
+
+def _format_s(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
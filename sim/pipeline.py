@@ -0,0 +1,370 @@
+import datetime
+import math
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+import numpy as np
+
+from core import database
+from core.log import record_event
+from core.models import Capture, NOAAImage
+from sdr.spectrum import power_spectrum_db, rssi_dbfs
+from tracking.predictor import PassPredictor, SatellitePass
+from tracking.scoring import rank_passes
+
+from .clock import VirtualClock
+from .metrics import Metrics
+from .radio import SyntheticSDR
+
+# This module simulates the capture pipeline of the ground stations on the
+# virtual clock:
+#
+#   planner    every PLAN_INTERVAL, asks the PassPredictor for the passes of
+#              the next PLAN_HORIZON over all stations at once; each station
+#              ranks its passes and greedily books those not overlapping a
+#              pass already booked
+#   capture    from rise to set, writes the synthetic I/Q of the pass to disk
+#              in CHUNK_S chunks and publishes the progress of each chunk to
+#              the stream; the Capture row is inserted at rise and finished
+#              at set
+#   decode     reads the capture back, estimates its SNR and records a
+#              NOAAImage row (the image file itself is not rendered)
+#   idle scan  between passes, steps through the scan range in
+#              `idle_scan.step_mhz` blocks of `idle_scan.duration_s`,
+#              recording an idle Capture per block and its spectrum in the
+#              occupancy index
+#
+# Every stage does its real work (synthesis, FFTs, file and database I/O)
+# and its wall-clock latency is recorded in the shared Metrics.
+
+PLAN_INTERVAL_S = 6 * 3600
+PLAN_HORIZON_H = 12
+CHUNK_S = 10.0
+
+# Downlink frequency by satellite name prefix; other satellites use the default
+DOWNLINKS_HZ = {"METEOR": 137_100_000, "NOAA": 137_620_000}
+DEFAULT_DOWNLINK_HZ = 137_912_500
+
+# Range covered by the idle scan, and bands holding intermittent transmitters
+SCAN_MIN_HZ = 30_000_000
+SCAN_MAX_HZ = 1_750_000_000
+BUSY_BANDS_HZ = [
+    (88_000_000, 108_000_000, 0.95),     # FM broadcast
+    (118_000_000, 137_000_000, 0.3),     # air band
+    (144_000_000, 148_000_000, 0.2),     # 2 m amateur
+    (433_050_000, 434_790_000, 0.4),     # ISM
+    (868_000_000, 870_000_000, 0.3),
+    (1_089_000_000, 1_091_000_000, 0.8),  # ADS-B
+]
+
+# Decode SNR at the horizon and its increase towards the zenith
+SNR_HORIZON_DB = 3.0
+SNR_ZENITH_GAIN_DB = 17.0
+
+
+def downlink_hz(satellite_name: str) -> int:
+    for prefix, freq_hz in DOWNLINKS_HZ.items():
+        if satellite_name.startswith(prefix):
+            return freq_hz
+    return DEFAULT_DOWNLINK_HZ
+
+
+def elevation_at(p: SatellitePass, when: datetime.datetime, min_elevation: float) -> float:
+    """Approximates the elevation during a pass by sine arcs through rise, culmination and set."""
+    if when <= p.culminate_time:
+        span = (p.culminate_time - p.rise_time).total_seconds()
+        fraction = (when - p.rise_time).total_seconds() / span if span > 0 else 1.0
+    else:
+        span = (p.set_time - p.culminate_time).total_seconds()
+        fraction = (p.set_time - when).total_seconds() / span if span > 0 else 1.0
+    fraction = min(max(fraction, 0.0), 1.0)
+    return min_elevation + (p.max_elevation_deg - min_elevation) * math.sin(0.5 * math.pi * fraction)
+
+
+def estimate_snr_db(iq_int8: np.ndarray, fft_size: int = 1024) -> Optional[float]:
+    """Estimates the SNR of a capture as its strongest spectral peak above the median floor."""
+    averages = iq_int8.size // (2 * fft_size)
+    if averages == 0:
+        return None
+    power_db = power_spectrum_db(iq_int8, fft_size, averages)
+    return float(power_db.max() - np.median(power_db))
+
+
+@dataclass
+class _ActivePass:
+    """A pass being captured."""
+    satellite_pass: SatellitePass
+    capture_id: int
+    capture_uuid: str
+    path: Path
+    file: BinaryIO
+    last_chunk: datetime.datetime
+    power_sum_dbfs: float = 0.0
+    chunks: int = 0
+    bytes_written: int = 0
+
+
+class Planner:
+    """
+    Plans all stations from one multi-station prediction per interval, the
+    way the service shares one propagation of every satellite between them.
+    """
+
+    def __init__(self, predictor: PassPredictor, clock: VirtualClock, metrics: Metrics,
+                 pipelines: List["StationPipeline"]):
+        self.predictor = predictor
+        self.clock = clock
+        self.metrics = metrics
+        self.pipelines = pipelines
+
+    def start(self):
+        self.clock.schedule(self.clock.now, self.plan)
+
+    def plan(self):
+        names = [pipeline.station.name for pipeline in self.pipelines]
+        with self.metrics.timed("predict"):
+            passes = self.predictor.find_upcoming_passes_by_station(PLAN_HORIZON_H, names)
+        for pipeline in self.pipelines:
+            pipeline.book(passes[pipeline.station.name])
+        self.clock.schedule_in(PLAN_INTERVAL_S, self.plan)
+
+
+class StationPipeline:
+    """
+    Captures and decodes the passes booked for one station and idle-scans
+    between them, driven by the events of a VirtualClock.
+    """
+
+    def __init__(self, station, config, predictor: PassPredictor, clock: VirtualClock,
+                 metrics: Metrics, sample_rate_hz: int, occupancy_index=None, broadcaster=None,
+                 seed: int = 0):
+        """
+        Args:
+            station (StationConfig): The simulated station.
+            config (AppConfig): The application's configuration object.
+            predictor (PassPredictor): The predictor, running on `clock`.
+            clock (VirtualClock): The simulation clock.
+            metrics (Metrics): Collects counters and latencies.
+            sample_rate_hz (int): Sample rate of pass captures.
+            occupancy_index (OccupancyIndex, optional): Receives the idle-scan spectra.
+            broadcaster (SpectrumBroadcaster, optional): Receives the capture progress.
+            seed (int): Seed of the synthetic signals.
+        """
+        self.station = station
+        self.config = config
+        self.predictor = predictor
+        self.clock = clock
+        self.metrics = metrics
+        self.sample_rate_hz = sample_rate_hz
+        self.occupancy_index = occupancy_index
+        self.broadcaster = broadcaster
+        self.captures_dir = Path(config.data_paths.captures) / station.name
+        self.decoded_dir = Path(config.data_paths.decoded) / station.name
+        self.captures_dir.mkdir(parents=True, exist_ok=True)
+
+        self.radio = SyntheticSDR(seed)
+        self.radio.set_lna_gain(config.sdr.gain_lna)
+        self.radio.set_vga_gain(config.sdr.gain_vga)
+        self._rng = np.random.default_rng(seed)
+
+        self._booked: List[SatellitePass] = []
+        self._seen = set()
+        self._active: Optional[_ActivePass] = None
+        self._scan_freq_hz = SCAN_MIN_HZ
+        # Incremented whenever the idle scan is (re)started, ending any older chain of blocks
+        self._scan_generation = 0
+
+    def start(self):
+        self._resume_scan()
+
+    def _gains(self) -> dict:
+        return {"lna": self.radio.lna_gain_db, "vga": self.radio.vga_gain_db}
+
+    def _commit(self, db, *rows):
+        with self.metrics.timed("db_commit"):
+            db.add_all(rows)
+            db.commit()
+
+    # --- Planning ---
+
+    def book(self, passes: List[SatellitePass]):
+        """Books the best of the given passes that do not overlap a pass already booked."""
+        for p in rank_passes(passes):
+            key = (p.satellite_name, p.rise_time)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.metrics.count("passes_predicted")
+            if any(p.rise_time < b.set_time and b.rise_time < p.set_time for b in self._booked):
+                self.metrics.count("passes_conflicting")
+                continue
+            self._booked.append(p)
+            self.clock.schedule(p.rise_time, lambda p=p: self.begin_pass(p))
+
+        # Booked passes that are over are no longer needed for conflict checks
+        now = self.clock.now
+        self._booked = [b for b in self._booked if b.set_time > now]
+
+    def _next_rise(self) -> Optional[datetime.datetime]:
+        now = self.clock.now
+        return min((b.rise_time for b in self._booked if b.rise_time >= now), default=None)
+
+    # --- Pass Capture ---
+
+    def begin_pass(self, p: SatellitePass):
+        if self._active is not None:
+            self.metrics.count("passes_missed")
+            return
+
+        self.radio.set_frequency(downlink_hz(p.satellite_name))
+        self.radio.set_sample_rate(self.sample_rate_hz)
+        capture_uuid = str(uuid.uuid4())
+        path = self.captures_dir / f"{capture_uuid}.iq"
+
+        db = database.SessionLocal()
+        try:
+            capture = Capture(
+                uuid=capture_uuid,
+                mode="priority",
+                frequency_hz=self.radio.center_freq_hz,
+                bandwidth_hz=self.config.noaa.apt_bandwidth_hz,
+                gains=self._gains(),
+                timestamp_start=self.clock.utcnow(),
+                notes=f"{p.satellite_name} pass, max elevation {p.max_elevation_deg:.1f} deg",
+            )
+            self._commit(db, capture)
+            capture_id = capture.id
+        finally:
+            db.close()
+
+        self._active = _ActivePass(p, capture_id, capture_uuid, path, open(path, "wb"), self.clock.now)
+        self.clock.schedule(min(self.clock.now + datetime.timedelta(seconds=CHUNK_S), p.set_time), self.capture_chunk)
+
+    def capture_chunk(self):
+        """Writes the samples received since the previous chunk."""
+        active = self._active
+        p = active.satellite_pass
+        now = self.clock.now
+        n_samples = int(self.sample_rate_hz * (now - active.last_chunk).total_seconds())
+        middle = active.last_chunk + (now - active.last_chunk) / 2
+        elevation = elevation_at(p, middle, self.predictor.min_elevation)
+        snr_db = SNR_HORIZON_DB + SNR_ZENITH_GAIN_DB * math.sin(math.radians(elevation))
+
+        with self.metrics.timed("chunk_write"):
+            block = self.radio.receive(n_samples, snr_db, offset_hz=self.sample_rate_hz / 4)
+            active.file.write(block.tobytes())
+        self.metrics.count("bytes_written", block.nbytes)
+        chunk_dbfs = rssi_dbfs(block)
+        active.power_sum_dbfs += chunk_dbfs
+        active.chunks += 1
+        active.bytes_written += block.nbytes
+        active.last_chunk = now
+
+        if self.broadcaster is not None:
+            with self.metrics.timed("progress_publish"):
+                self.broadcaster.publish_progress(
+                    active.capture_uuid, active.bytes_written, self.radio.to_dbm(chunk_dbfs),
+                )
+
+        if now >= p.set_time:
+            self.end_pass()
+        else:
+            self.clock.schedule(min(now + datetime.timedelta(seconds=CHUNK_S), p.set_time), self.capture_chunk)
+
+    def end_pass(self):
+        active, self._active = self._active, None
+        active.file.close()
+        p = active.satellite_pass
+
+        db = database.SessionLocal()
+        try:
+            capture = db.get(Capture, active.capture_id)
+            capture.timestamp_end = self.clock.utcnow()
+            capture.rssi_avg_dbm = self.radio.to_dbm(active.power_sum_dbfs / max(active.chunks, 1))
+            capture.file_paths = {"iq": str(active.path)}
+            self._commit(db, capture)
+
+            with self.metrics.timed("decode"):
+                snr_db = estimate_snr_db(np.fromfile(active.path, dtype=np.int8))
+            image = NOAAImage(
+                capture_id=capture.id,
+                satellite_name=p.satellite_name,
+                image_path=str(self.decoded_dir / f"{capture.uuid}.png"),
+                max_elevation=p.max_elevation_deg,
+                snr_db=snr_db,
+                timestamp_decoded=self.clock.utcnow(),
+            )
+            self._commit(db, image)
+        finally:
+            db.close()
+
+        self.metrics.count("passes_captured")
+        record_event(
+            "pass_captured", f"Captured {p.satellite_name} at station '{self.station.name}'.",
+            station=self.station.name, snr_db=snr_db,
+        )
+        self._resume_scan()
+
+    # --- Idle Scan ---
+
+    def _resume_scan(self):
+        self._scan_generation += 1
+        generation = self._scan_generation
+        self.clock.schedule(self.clock.now, lambda: self.idle_block(generation))
+
+    def idle_block(self, generation: int):
+        """Scans one block and books the next, unless a pass starts before it would end."""
+        if generation != self._scan_generation or self._active is not None:
+            return
+        duration_s = self.config.idle_scan.duration_s
+        end = self.clock.now + datetime.timedelta(seconds=duration_s)
+        next_rise = self._next_rise()
+        if next_rise is not None and next_rise < end:
+            return  # the pass resumes the scan when it ends
+
+        with self.metrics.timed("idle_block"):
+            self._scan_block(duration_s)
+        self.metrics.count("idle_blocks")
+        self.clock.schedule(end, lambda: self.idle_block(generation))
+
+    def _scan_block(self, duration_s: float):
+        span_hz = self.config.idle_scan.step_mhz * 1_000_000
+        center_hz = self._scan_freq_hz + span_hz // 2
+        self._scan_freq_hz += span_hz
+        if self._scan_freq_hz >= SCAN_MAX_HZ:
+            self._scan_freq_hz = SCAN_MIN_HZ
+        self.radio.set_frequency(center_hz)
+        self.radio.set_sample_rate(span_hz)
+
+        # A transmitter in the block's span is on air with its band's duty cycle
+        snr_db, offset_hz = None, 0.0
+        for low, high, duty in BUSY_BANDS_HZ:
+            if low < center_hz + span_hz / 2 and center_hz - span_hz / 2 < high and self._rng.random() < duty:
+                freq_hz = self._rng.uniform(max(low, center_hz - span_hz / 2), min(high, center_hz + span_hz / 2))
+                snr_db, offset_hz = float(self._rng.uniform(15.0, 40.0)), freq_hz - center_hz
+                break
+
+        fft_size, averages = self.config.stream.fft_size, self.config.stream.averages
+        block = self.radio.receive(fft_size * averages, snr_db, offset_hz)
+        power_db = power_spectrum_db(block, fft_size, averages)
+
+        start = self.clock.utcnow()
+        db = database.SessionLocal()
+        try:
+            self._commit(db, Capture(
+                uuid=str(uuid.uuid4()),
+                mode="idle",
+                frequency_hz=center_hz,
+                bandwidth_hz=span_hz,
+                gains=self._gains(),
+                timestamp_start=start,
+                timestamp_end=start + datetime.timedelta(seconds=duration_s),
+                rssi_avg_dbm=self.radio.to_dbm(rssi_dbfs(block)),
+            ))
+        finally:
+            db.close()
+
+        if self.occupancy_index is not None:
+            self.occupancy_index.record_spectrum(start, center_hz, span_hz, power_db, duration_s)
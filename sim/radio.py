@@ -0,0 +1,78 @@
+from typing import Optional
+
+import numpy as np
+
+from sdr.ring import RingBuffer
+
+# This module provides a synthetic stand-in for the HackRF wrapper. It has
+# the same tuning and gain interface and an `rx_ring`, and generates int8
+# I/Q blocks on demand instead of streaming from hardware: Gaussian noise at
+# a fixed floor plus an optional carrier at a given SNR.
+
+NOISE_FLOOR_DBFS = -30.0
+# Offset between dBFS at the ADC and the dBm reported for captures, at zero gain
+DBM_OFFSET_DB = -40.0
+
+
+class SyntheticSDR:
+    """
+    A simulated SDR producing noise and carriers with a controlled SNR.
+    """
+
+    def __init__(self, seed: int = 0, ring_size_bytes: int = 1 << 20):
+        self.is_open = True
+        self.center_freq_hz: Optional[int] = None
+        self.sample_rate_hz: Optional[int] = None
+        self.lna_gain_db: Optional[int] = None
+        self.vga_gain_db: Optional[int] = None
+        self.rx_ring = RingBuffer(ring_size_bytes)
+        self._rng = np.random.default_rng(seed)
+        self._phase = 0.0
+
+    def open(self) -> bool:
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def set_frequency(self, freq_hz: int):
+        self.center_freq_hz = freq_hz
+
+    def set_sample_rate(self, sample_rate_hz: int):
+        self.sample_rate_hz = sample_rate_hz
+
+    def set_lna_gain(self, gain_db: int):
+        self.lna_gain_db = gain_db
+
+    def set_vga_gain(self, gain_db: int):
+        self.vga_gain_db = gain_db
+
+    def to_dbm(self, dbfs: float) -> float:
+        """Converts a level at the ADC to the input level, removing the gains."""
+        return dbfs + DBM_OFFSET_DB - (self.lna_gain_db or 0) - (self.vga_gain_db or 0)
+
+    def receive(self, n_samples: int, snr_db: Optional[float] = None,
+                offset_hz: float = 0.0) -> np.ndarray:
+        """
+        Generates the next `n_samples` complex samples as interleaved int8 I/Q
+        bytes and appends them to `rx_ring`.
+
+        Args:
+            n_samples (int): Number of complex samples.
+            snr_db (float, optional): Carrier power above the noise floor; None for noise only.
+            offset_hz (float): Carrier offset from the center frequency.
+        """
+        noise_rms = 128.0 * 10.0 ** (NOISE_FLOOR_DBFS / 20.0) / np.sqrt(2.0)
+        iq = self._rng.normal(0.0, noise_rms, (n_samples, 2)).astype(np.float32)
+
+        if snr_db is not None:
+            amplitude = 128.0 * 10.0 ** ((NOISE_FLOOR_DBFS + snr_db) / 20.0)
+            step = 2.0 * np.pi * offset_hz / (self.sample_rate_hz or n_samples)
+            phase = self._phase + step * np.arange(n_samples, dtype=np.float64)
+            iq[:, 0] += (amplitude * np.cos(phase)).astype(np.float32)
+            iq[:, 1] += (amplitude * np.sin(phase)).astype(np.float32)
+            self._phase = float((phase[-1] + step) % (2.0 * np.pi)) if n_samples else self._phase
+
+        block = np.clip(np.rint(iq), -128, 127).astype(np.int8).ravel()
+        self.rx_ring.write(block)
+        return block
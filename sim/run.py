@@ -0,0 +1,279 @@
+"""
+Replays days of station operation in minutes on a virtual clock.
+
+Satellites are loaded from the checked-in data/noaa_tle.txt. The
+PassPredictor runs on a VirtualClock starting at the TLE epoch, and each
+ground station runs the simulated capture pipeline (sim/pipeline.py) on a
+synthetic SDR against a fresh SQLite database and occupancy index in a
+temporary directory. Capture progress is published through a
+SpectrumBroadcaster to one WebSocket-like client on its own event loop.
+Time jumps from one event to the next, so the run takes as long as the work
+itself.
+
+The report gives the simulation speed, the pipeline's throughput, the disk
+and database growth (with disk use projected to a real capture sample rate)
+and latency histograms of every stage.
+
+Usage:
+    python -m sim.run --days 3 --stations 2
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func
+
+from core import database
+from core.config import AppConfig, StationConfig
+from core.log import setup_logging, shutdown_logging
+from core.models import Capture, CaptureDailyStat, Event, NOAAImage
+from core.stream import SpectrumBroadcaster
+from storage.occupancy import OccupancyIndex
+from tracking.predictor import PassPredictor
+from tracking.scoring import PassScorer
+from tracking.tle import TLEManager
+
+from .clock import VirtualClock
+from .metrics import Metrics
+from .pipeline import Planner, StationPipeline
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Virtual time between samples of the database and disk sizes
+SAMPLE_INTERVAL = datetime.timedelta(hours=1)
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _tle_epoch(tle_manager: TLEManager) -> datetime.datetime:
+    """The latest TLE epoch, rounded down to the hour."""
+    epoch = max(sat.epoch.utc_datetime() for sat in tle_manager.satellites.values())
+    return epoch.replace(minute=0, second=0, microsecond=0)
+
+
+def build_config(workdir: Path, args) -> AppConfig:
+    with open(ROOT / "config.json.example") as f:
+        config = AppConfig.parse_obj(json.load(f))
+    config.data_paths.base = ROOT / "data"
+    config.noaa.tle_cache_days = 100000  # always use the checked-in TLE file
+    config.data_paths.captures = workdir / "captures"
+    config.data_paths.decoded = workdir / "decoded"
+    config.data_paths.db = workdir / "rfsentinel.db"
+    config.data_paths.occupancy = workdir / "occupancy"
+    config.logging.level = args.log_level
+    config.logging.format = "text"
+    config.stations = [
+        StationConfig(name=f"station-{i}", latitude=-60 + 120 * i / args.stations,
+                      longitude=-180 + 360 * i / args.stations, elevation_m=0)
+        for i in range(1, args.stations)
+    ]
+    return config
+
+
+def start_stream(config: AppConfig, metrics: Metrics):
+    """
+    Starts a SpectrumBroadcaster on an event loop in its own thread, with one
+    client counting the frames it receives.
+
+    Returns:
+        The broadcaster and its event loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="sim-stream", daemon=True).start()
+    broadcaster = SpectrumBroadcaster(None, config.stream)
+
+    async def subscribe() -> asyncio.Queue:
+        await broadcaster.start()
+        return broadcaster.subscribe()
+
+    async def client(queue: asyncio.Queue):
+        while True:
+            await queue.get()
+            metrics.count("progress_frames")
+
+    queue = asyncio.run_coroutine_threadsafe(subscribe(), loop).result()
+    asyncio.run_coroutine_threadsafe(client(queue), loop)
+    return broadcaster, loop
+
+
+def stop_stream(broadcaster: SpectrumBroadcaster, loop: asyncio.AbstractEventLoop, metrics: Metrics):
+    # Let the client take the frames still queued on the loop
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0.1), loop).result()
+    asyncio.run_coroutine_threadsafe(broadcaster.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    metrics.count("progress_dropped", broadcaster.dropped_frames)
+
+
+def table_rows() -> dict:
+    db = database.SessionLocal()
+    try:
+        return {
+            model.__tablename__: db.query(func.count(model.id)).scalar()
+            for model in (Capture, NOAAImage, CaptureDailyStat, Event)
+        }
+    finally:
+        db.close()
+
+
+def run(args) -> dict:
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="rfsentinel-sim-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    config = build_config(workdir, args)
+
+    setup_logging(config.logging)
+    database.initialize_database(str(config.data_paths.db))
+    occupancy_index = OccupancyIndex(config.data_paths.occupancy, config.occupancy)
+    occupancy_index.start()
+
+    tle_manager = TLEManager(config)
+    tle_manager.load_satellites()
+    start = (datetime.datetime.fromisoformat(args.start).replace(tzinfo=datetime.timezone.utc)
+             if args.start else _tle_epoch(tle_manager))
+    end = start + datetime.timedelta(days=args.days)
+
+    clock = VirtualClock(start)
+    metrics = Metrics()
+    broadcaster, loop = start_stream(config, metrics)
+    predictor = PassPredictor(config, tle_manager, clock=clock)
+    # Reload the decode SNR statistics with every schedule; the TTL is in wall-clock time
+    predictor.scorer = PassScorer(config, snr_ttl_s=0.0)
+
+    pipelines = [
+        StationPipeline(station, config, predictor, clock, metrics, args.sample_rate,
+                        occupancy_index=occupancy_index, broadcaster=broadcaster, seed=i)
+        for i, station in enumerate(config.all_stations())
+    ]
+    Planner(predictor, clock, metrics, pipelines).start()
+    for pipeline in pipelines:
+        pipeline.start()
+
+    db_sizes = [config.data_paths.db.stat().st_size]
+    events = 0
+    wall_start = time.perf_counter()
+    while clock.now < end:
+        events += clock.run_until(min(clock.now + SAMPLE_INTERVAL, end))
+        db_sizes.append(config.data_paths.db.stat().st_size)
+        elapsed = clock.now - start
+        if elapsed.total_seconds() % 86400 == 0 or clock.now == end:
+            print(f"Simulated {elapsed} in {time.perf_counter() - wall_start:.1f} s", file=sys.stderr)
+    wall_s = time.perf_counter() - wall_start
+
+    stop_stream(broadcaster, loop, metrics)
+    occupancy_index.stop()
+    shutdown_logging()
+
+    counters = metrics.counters
+    captured_bytes = counters.get("bytes_written", 0)
+    report = {
+        "start": start.isoformat(),
+        "days": args.days,
+        "stations": len(pipelines),
+        "satellites": len(tle_manager.satellites),
+        "wall_s": wall_s,
+        "speedup": args.days * 86400 / wall_s,
+        "events": events,
+        "counters": counters,
+        "throughput_per_wall_s": {
+            "events": events / wall_s,
+            "passes_captured": counters.get("passes_captured", 0) / wall_s,
+            "idle_blocks": counters.get("idle_blocks", 0) / wall_s,
+            "bytes_written": captured_bytes / wall_s,
+        },
+        "disk": {
+            "captures_bytes": _dir_bytes(config.data_paths.captures),
+            "occupancy_bytes": _dir_bytes(config.data_paths.occupancy),
+            "sample_rate_hz": args.sample_rate,
+            # Raw capture size scales linearly with the sample rate
+            "projected_sample_rate_hz": args.real_sample_rate,
+            "projected_captures_bytes_per_day": captured_bytes * args.real_sample_rate / args.sample_rate / args.days,
+        },
+        "database": {
+            "start_bytes": db_sizes[0],
+            "end_bytes": db_sizes[-1],
+            "growth_bytes_per_day": (db_sizes[-1] - db_sizes[0]) / args.days,
+            "rows": table_rows(),
+        },
+        "latency_ms": metrics.latency_summary(),
+        "workdir": str(workdir),
+    }
+
+    report["histograms"] = {name: metrics.histogram_lines(name) for name in metrics.latencies}
+    if not args.keep and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+        report["workdir"] = None
+    return report
+
+
+def print_report(report: dict):
+    gib = 1024 ** 3
+    print(f"\nSimulated {report['days']} days from {report['start']} over {report['stations']} stations "
+          f"and {report['satellites']} satellites")
+    print(f"  wall time {report['wall_s']:.1f} s, {report['speedup']:.0f}x real time, {report['events']} events")
+
+    print("\nThroughput (per wall-clock second)")
+    for name, value in report["throughput_per_wall_s"].items():
+        print(f"  {name:<20} {value:>14.1f}")
+
+    print("\nCounters")
+    for name, value in sorted(report["counters"].items()):
+        print(f"  {name:<20} {value:>14}")
+
+    disk = report["disk"]
+    print("\nDisk")
+    print(f"  captures             {disk['captures_bytes'] / 1e6:>11.1f} MB at {disk['sample_rate_hz']} S/s")
+    print(f"  occupancy index      {disk['occupancy_bytes'] / 1e6:>11.1f} MB")
+    print(f"  projected captures   {disk['projected_captures_bytes_per_day'] / gib:>11.1f} GiB/day "
+          f"at {disk['projected_sample_rate_hz']} S/s")
+
+    database_report = report["database"]
+    print("\nDatabase")
+    print(f"  size                 {database_report['start_bytes'] / 1e6:.1f} -> "
+          f"{database_report['end_bytes'] / 1e6:.1f} MB "
+          f"({database_report['growth_bytes_per_day'] / 1e6:.1f} MB/day)")
+    for table, rows in database_report["rows"].items():
+        print(f"  {table:<20} {rows:>14} rows")
+
+    print("\nLatency (ms)          count       p50       p90       p99       max")
+    for name, stats in report["latency_ms"].items():
+        print(f"  {name:<14} {stats['count']:>10} {stats['p50_ms']:>9.3f} {stats['p90_ms']:>9.3f} "
+              f"{stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+        for line in report["histograms"][name]:
+            print(line)
+
+    if report["workdir"]:
+        print(f"\nSimulation data kept in {report['workdir']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=float, default=1.0, help="Simulated days.")
+    parser.add_argument("--start", help="Simulated start time (ISO 8601, UTC). Defaults to the TLE epoch.")
+    parser.add_argument("--stations", type=int, default=1, help="Number of ground stations.")
+    parser.add_argument("--sample-rate", type=int, default=2000,
+                        help="Sample rate of the simulated pass captures in S/s.")
+    parser.add_argument("--real-sample-rate", type=int, default=2_000_000,
+                        help="Sample rate the disk usage is projected to in S/s.")
+    parser.add_argument("--workdir", help="Directory for the simulated data, kept after the run. Defaults to a temporary one.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directory after the run.")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level of the application modules.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
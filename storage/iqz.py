@@ -0,0 +1,187 @@
+import logging
+import struct
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# This module implements the IQZ container used for compressed captures.
+# Raw interleaved int8 I/Q is split into fixed-size chunks that are
+# (optionally requantized and) compressed independently, and a chunk index
+# is stored at the end of the file so a reader can decompress only the
+# chunks covering a requested sample range.
+#
+# Layout:
+#   HEADER | chunk 0 | chunk 1 | ... | index (n_chunks + 1 uint64 offsets) | FOOTER
+#
+# zstandard is used when available; otherwise the stdlib zlib codec at a fast
+# level keeps the feature working without extra dependencies.
+
+ZSTD_ENABLED = False
+try:
+    import zstandard
+    ZSTD_ENABLED = True
+except ImportError:
+    logging.info("zstandard is not installed; capture compression will use zlib.")
+
+MAGIC = b"IQZ1"
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# magic, codec, requantization bits, chunk size in samples, total samples
+HEADER = struct.Struct("<4sBBxxIQ")
+# offset of the chunk index, number of chunks
+FOOTER = struct.Struct("<QI")
+
+
+def requantize(iq_int8: np.ndarray, bits: int) -> np.ndarray:
+    """Keeps only the `bits` most significant bits of each int8 value (lossy when bits < 8)."""
+    if not 1 <= bits <= 8:
+        raise ValueError(f"Requantization bits must be between 1 and 8, got {bits}.")
+    if bits == 8:
+        return iq_int8
+    return iq_int8 >> (8 - bits)
+
+
+def dequantize(values: np.ndarray, bits: int) -> np.ndarray:
+    """Restores requantized values to the int8 scale, at the middle of each quantization step."""
+    if bits == 8:
+        return values
+    shift = 8 - bits
+    return ((values.astype(np.int16) << shift) + (1 << (shift - 1))).astype(np.int8)
+
+
+def _compressor(codec: int, level: int):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress
+    return lambda data: zlib.compress(data, level)
+
+
+def _decompressor(codec: int):
+    if codec == CODEC_ZSTD:
+        if not ZSTD_ENABLED:
+            raise RuntimeError("This capture was compressed with zstandard, which is not installed.")
+        return zstandard.ZstdDecompressor().decompress
+    if codec == CODEC_ZLIB:
+        return zlib.decompress
+    raise ValueError(f"Unknown IQZ codec id {codec}.")
+
+
+def compress_file(src: Path, dst: Path, chunk_samples: int = 1 << 18, bits: int = 8, level: int = 3) -> dict:
+    """
+    Compresses a raw int8 I/Q file into an IQZ file.
+
+    Args:
+        src (Path): The raw interleaved int8 I/Q file.
+        dst (Path): The IQZ file to create.
+        chunk_samples (int): Complex samples per independently compressed chunk.
+        bits (int): Bits kept per I/Q value; 8 is lossless.
+        level (int): Compression level passed to the codec.
+
+    Returns:
+        A dictionary with the raw and compressed sizes in bytes.
+    """
+    codec = CODEC_ZSTD if ZSTD_ENABLED else CODEC_ZLIB
+    if codec == CODEC_ZLIB:
+        level = min(max(level, 1), 9)
+    compress = _compressor(codec, level)
+
+    raw = np.memmap(src, dtype=np.int8, mode="r") if Path(src).stat().st_size else np.empty(0, np.int8)
+    raw = raw[:raw.size - raw.size % 2]
+    chunk_bytes = 2 * chunk_samples
+
+    offsets = []
+    tmp = Path(dst).with_suffix(".iqz.part")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, codec, bits, chunk_samples, raw.size // 2))
+        for start in range(0, raw.size, chunk_bytes):
+            offsets.append(f.tell())
+            f.write(compress(requantize(np.asarray(raw[start:start + chunk_bytes]), bits).tobytes()))
+        offsets.append(f.tell())
+
+        index_offset = f.tell()
+        f.write(np.asarray(offsets, dtype="<u8").tobytes())
+        f.write(FOOTER.pack(index_offset, len(offsets) - 1))
+    # Only expose the file once it is complete
+    tmp.replace(dst)
+
+    return {"raw_bytes": int(raw.size), "compressed_bytes": Path(dst).stat().st_size}
+
+
+class IQZReader:
+    """
+    Random-access reader for IQZ files. Only the chunks overlapping a
+    requested sample range are decompressed; the last chunk is cached so
+    sequential reads do not decompress the same data twice.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+
+        magic, self.codec, self.bits, self.chunk_samples, self.total_samples = HEADER.unpack(
+            self._file.read(HEADER.size)
+        )
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"'{self.path}' is not an IQZ file.")
+
+        self._file.seek(-FOOTER.size, 2)
+        index_offset, n_chunks = FOOTER.unpack(self._file.read(FOOTER.size))
+        self._file.seek(index_offset)
+        self._offsets = np.frombuffer(self._file.read(8 * (n_chunks + 1)), dtype="<u8")
+
+        self._decompress = _decompressor(self.codec)
+        self._cached_index: Optional[int] = None
+        self._cached_chunk: Optional[np.ndarray] = None
+
+    def _chunk(self, index: int) -> np.ndarray:
+        if index != self._cached_index:
+            start, end = int(self._offsets[index]), int(self._offsets[index + 1])
+            self._file.seek(start)
+            values = np.frombuffer(self._decompress(self._file.read(end - start)), dtype=np.int8)
+            self._cached_chunk = dequantize(values, self.bits)
+            self._cached_index = index
+        return self._cached_chunk
+
+    def read(self, offset: int, count: int) -> np.ndarray:
+        """
+        Reads `count` complex samples starting at sample `offset`.
+
+        Returns:
+            Interleaved int8 I/Q values (2 * count of them, fewer at end of file).
+        """
+        end = min(offset + count, self.total_samples)
+        if offset < 0 or offset >= end:
+            return np.empty(0, dtype=np.int8)
+
+        parts = []
+        for index in range(offset // self.chunk_samples, (end - 1) // self.chunk_samples + 1):
+            chunk_start = index * self.chunk_samples
+            lo = max(offset, chunk_start) - chunk_start
+            hi = min(end, chunk_start + self.chunk_samples) - chunk_start
+            parts.append(self._chunk(index)[2 * lo:2 * hi])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_iq(path: Path, offset: int, count: int) -> np.ndarray:
+    """
+    Reads `count` complex samples from sample `offset` of a capture,
+    whether it is a raw .iq file or a compressed .iqz file.
+    """
+    path = Path(path)
+    if path.suffix == ".iqz":
+        with IQZReader(path) as reader:
+            return reader.read(offset, count)
+    raw = np.memmap(path, dtype=np.int8, mode="r")
+    return np.array(raw[2 * offset:2 * (offset + count)])
@@ -0,0 +1,308 @@
+import calendar
+import datetime
+import json
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import event
+
+from core.models import Capture
+from core.queries import capture_finished
+
+# This module maintains a persistent RF activity index: which frequency bins
+# were active in which time buckets, built incrementally from idle-scan
+# detections so "when was X MHz busy" never needs the raw spectra.
+#
+# Two bitmaps with one bit per frequency bin and one row per time bucket are
+# kept in memory-mapped .npy files: `observed` (the bin was scanned) and
+# `active` (a signal was detected). Rows form a ring over the retention
+# period; `buckets.npy` records which bucket each row currently holds, so a
+# row is cleared when the ring wraps onto it. With the defaults (1 MHz bins
+# up to 6 GHz, 5-minute buckets, 35 days) each bitmap is about 7.5 MB.
+#
+# The geometry is stored in `occupancy.json`; if the configuration changes
+# it, the index is rebuilt empty.
+
+HEADER_FILE = "occupancy.json"
+ACTIVE_FILE = "active.npy"
+OBSERVED_FILE = "observed.npy"
+BUCKETS_FILE = "buckets.npy"
+
+# Captures of this mode are idle-scan blocks
+IDLE_MODE = "idle"
+
+
+def _epoch_s(timestamp: datetime.datetime) -> float:
+    """Seconds since the epoch; naive timestamps are UTC, as in the database."""
+    if timestamp.tzinfo is not None:
+        return timestamp.timestamp()
+    return calendar.timegm(timestamp.timetuple()) + timestamp.microsecond / 1e6
+
+
+@dataclass
+class BandOccupancy:
+    """The result of an occupancy query over a band and a time window."""
+    # Busy intervals (any bin of the band active), as naive UTC datetimes
+    intervals: List[Tuple[datetime.datetime, datetime.datetime]]
+    # Lower edge of each frequency bin of the band
+    freqs_hz: np.ndarray
+    # Seconds each bin was observed and found active
+    observed_s: np.ndarray
+    active_s: np.ndarray
+
+
+class OccupancyIndex:
+    """
+    A memory-mapped bitmap index of RF activity per frequency bin and time bucket.
+    """
+
+    def __init__(self, directory: Path, config):
+        """
+        Args:
+            directory (Path): Directory holding the index files.
+            config (OccupancyConfig): The index settings.
+        """
+        self.directory = Path(directory)
+        self.config = config
+        self.bin_hz = config.bin_hz
+        self.bucket_s = config.bucket_s
+        self.n_bins = math.ceil((config.freq_max_hz - config.freq_min_hz) / config.bin_hz)
+        self.row_bytes = (self.n_bins + 7) // 8
+        self.n_slots = math.ceil(config.retention_days * 86400 / config.bucket_s)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners = []
+        self._open()
+
+    # --- Storage ---
+
+    def _geometry(self) -> dict:
+        return {
+            "freq_min_hz": self.config.freq_min_hz,
+            "bin_hz": self.bin_hz,
+            "n_bins": self.n_bins,
+            "bucket_s": self.bucket_s,
+            "n_slots": self.n_slots,
+        }
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header_path = self.directory / HEADER_FILE
+        geometry = self._geometry()
+        files = [self.directory / name for name in (ACTIVE_FILE, OBSERVED_FILE, BUCKETS_FILE)]
+
+        existing = None
+        if header_path.exists() and all(path.exists() for path in files):
+            try:
+                existing = json.loads(header_path.read_text())
+            except ValueError as e:
+                logging.warning(f"Occupancy index header is unreadable, rebuilding: {e}")
+
+        if existing == geometry:
+            self._active = np.lib.format.open_memmap(files[0], mode="r+")
+            self._observed = np.lib.format.open_memmap(files[1], mode="r+")
+            self._buckets = np.lib.format.open_memmap(files[2], mode="r+")
+            logging.info(f"Occupancy index opened from '{self.directory}'.")
+            return
+
+        if existing is not None:
+            logging.warning("Occupancy index geometry changed in the configuration; rebuilding it empty.")
+        shape = (self.n_slots, self.row_bytes)
+        self._active = np.lib.format.open_memmap(files[0], mode="w+", dtype=np.uint8, shape=shape)
+        self._observed = np.lib.format.open_memmap(files[1], mode="w+", dtype=np.uint8, shape=shape)
+        self._buckets = np.lib.format.open_memmap(files[2], mode="w+", dtype=np.int64, shape=(self.n_slots,))
+        self._buckets[:] = -1
+        self.flush()
+        header_path.write_text(json.dumps(geometry, indent=2))
+        logging.info(f"Created occupancy index in '{self.directory}' ({self.n_bins} bins x {self.n_slots} buckets).")
+
+    def flush(self):
+        """Writes pending changes of the memory maps to disk."""
+        with self._lock:
+            self._active.flush()
+            self._observed.flush()
+            self._buckets.flush()
+
+    def start(self):
+        """Starts the periodic flush thread and indexes idle-scan captures as they finish."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="occupancy-flush", daemon=True)
+        self._thread.start()
+        self._listen()
+
+    def stop(self):
+        """Stops indexing captures and flushes the index."""
+        for identifier, fn in self._listeners:
+            event.remove(Capture, identifier, fn)
+        self._listeners = []
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.config.flush_interval_s):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Failed to flush the occupancy index: {e}")
+
+    # --- Recording ---
+
+    def _bin_range(self, freq_lo_hz: float, freq_hi_hz: float) -> Tuple[int, int]:
+        """Returns the [first, last) bins overlapping the frequency range."""
+        lo = math.floor((freq_lo_hz - self.config.freq_min_hz) / self.bin_hz)
+        hi = math.ceil((freq_hi_hz - self.config.freq_min_hz) / self.bin_hz)
+        return max(lo, 0), min(max(hi, lo + 1), self.n_bins)
+
+    def _slot(self, bucket: int) -> Optional[int]:
+        """Returns the row of a bucket, claiming it if the ring has moved on. Lock held."""
+        slot = bucket % self.n_slots
+        current = int(self._buckets[slot])
+        if current == bucket:
+            return slot
+        if current > bucket:
+            return None  # the bucket is older than the retention period
+        self._active[slot] = 0
+        self._observed[slot] = 0
+        self._buckets[slot] = bucket
+        return slot
+
+    def mark(self, start: datetime.datetime, end: datetime.datetime,
+             freq_lo_hz: float, freq_hi_hz: float, active: bool):
+        """
+        Records that a frequency range was observed, and whether it was active,
+        over a time span.
+        """
+        first, last = self._bin_range(freq_lo_hz, freq_hi_hz)
+        if first >= last:
+            return
+        mask = np.zeros(self.row_bytes * 8, dtype=bool)
+        mask[first:last] = True
+        self._set_bits(start, end, np.packbits(mask), np.packbits(mask) if active else None)
+
+    def record_spectrum(self, timestamp: datetime.datetime, center_freq_hz: int, sample_rate_hz: int,
+                        power_db: np.ndarray, duration_s: float = 0.0):
+        """
+        Records a scanned spectrum. Bins more than `detection_threshold_db` above
+        the median noise floor are detections.
+
+        Args:
+            timestamp (datetime.datetime): Time the spectrum was taken (naive UTC).
+            center_freq_hz (int): Tuned center frequency.
+            sample_rate_hz (int): Sample rate, i.e. the spectrum's span.
+            power_db (np.ndarray): Power per FFT bin, DC-centered (as `power_spectrum_db`).
+            duration_s (float): Time span the spectrum covers.
+        """
+        n = power_db.size
+        freqs = center_freq_hz + (np.arange(n) - n // 2) * (sample_rate_hz / n)
+        bins = np.floor((freqs - self.config.freq_min_hz) / self.bin_hz).astype(np.int64)
+        inside = (bins >= 0) & (bins < self.n_bins)
+        if not inside.any():
+            return
+
+        detected = power_db > np.median(power_db) + self.config.detection_threshold_db
+        observed = np.zeros(self.row_bytes * 8, dtype=bool)
+        observed[bins[inside]] = True
+        active = np.zeros(self.row_bytes * 8, dtype=bool)
+        active[bins[inside & detected]] = True
+
+        end = timestamp + datetime.timedelta(seconds=duration_s)
+        self._set_bits(timestamp, end, np.packbits(observed), np.packbits(active) if active.any() else None)
+
+    def record_capture(self, capture: Capture):
+        """Records a finished idle-scan capture using its average RSSI as the detection."""
+        if capture.mode != IDLE_MODE or capture.frequency_hz is None or capture.timestamp_start is None:
+            return
+        half_bw = (capture.bandwidth_hz or self.bin_hz) / 2
+        active = capture.rssi_avg_dbm is not None and capture.rssi_avg_dbm >= self.config.capture_threshold_dbm
+        self.mark(
+            capture.timestamp_start, capture.timestamp_end or capture.timestamp_start,
+            capture.frequency_hz - half_bw, capture.frequency_hz + half_bw, active,
+        )
+
+    def _set_bits(self, start: datetime.datetime, end: datetime.datetime,
+                  observed_row: np.ndarray, active_row: Optional[np.ndarray]):
+        first = int(_epoch_s(start) // self.bucket_s)
+        last = int(_epoch_s(end) // self.bucket_s)
+        first = max(first, last - self.n_slots + 1)
+        with self._lock:
+            for bucket in range(first, last + 1):
+                slot = self._slot(bucket)
+                if slot is None:
+                    continue
+                self._observed[slot] |= observed_row
+                if active_row is not None:
+                    self._active[slot] |= active_row
+
+    def _listen(self):
+        def inserted(mapper, connection, target):
+            if target.timestamp_end is not None:
+                self.record_capture(target)
+
+        def updated(mapper, connection, target):
+            # Indexed once, when the capture's end timestamp is first set
+            if capture_finished(target):
+                self.record_capture(target)
+
+        self._listeners = [("after_insert", inserted), ("after_update", updated)]
+        for identifier, fn in self._listeners:
+            event.listen(Capture, identifier, fn)
+
+    # --- Queries ---
+
+    def query(self, freq_min_hz: float, freq_max_hz: float,
+              start: datetime.datetime, end: datetime.datetime) -> BandOccupancy:
+        """
+        Answers when a band was busy within [start, end).
+
+        Returns:
+            A BandOccupancy with the merged busy intervals of the band and the
+            observed and active time of each of its bins.
+        """
+        first, last = self._bin_range(freq_min_hz, freq_max_hz)
+        first_bucket = int(_epoch_s(start) // self.bucket_s)
+        last_bucket = math.ceil(_epoch_s(end) / self.bucket_s) - 1
+        byte_lo, byte_hi = first // 8, (last + 7) // 8
+
+        with self._lock:
+            ids = np.asarray(self._buckets)
+            slots = np.flatnonzero((ids >= first_bucket) & (ids <= last_bucket))
+            slots = slots[np.argsort(ids[slots])]
+            buckets = ids[slots]
+            observed = np.asarray(self._observed[slots, byte_lo:byte_hi])
+            active = np.asarray(self._active[slots, byte_lo:byte_hi])
+
+        offset = first - 8 * byte_lo
+        observed = np.unpackbits(observed, axis=1)[:, offset:offset + last - first]
+        active = np.unpackbits(active, axis=1)[:, offset:offset + last - first]
+
+        return BandOccupancy(
+            intervals=self._busy_intervals(buckets, active.any(axis=1)),
+            freqs_hz=self.config.freq_min_hz + np.arange(first, last, dtype=np.int64) * self.bin_hz,
+            observed_s=observed.sum(axis=0) * self.bucket_s,
+            active_s=active.sum(axis=0) * self.bucket_s,
+        )
+
+    def _busy_intervals(self, buckets: np.ndarray, busy: np.ndarray):
+        """Merges consecutive busy buckets into (start, end) intervals."""
+        busy_buckets = buckets[busy]
+        if busy_buckets.size == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(busy_buckets) != 1)
+        run_starts = np.concatenate(([busy_buckets[0]], busy_buckets[breaks + 1]))
+        run_ends = np.concatenate((busy_buckets[breaks], [busy_buckets[-1]])) + 1
+
+        epoch = datetime.datetime(1970, 1, 1)
+        return [
+            (epoch + datetime.timedelta(seconds=int(s) * self.bucket_s),
+             epoch + datetime.timedelta(seconds=int(e) * self.bucket_s))
+            for s, e in zip(run_starts, run_ends)
+        ]
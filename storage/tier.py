@@ -0,0 +1,275 @@
+import datetime
+import logging
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, null
+
+from core import database
+from core.log import init_worker_logging, worker_context
+from core.models import Capture
+
+from .iqz import compress_file
+
+# This module runs the background storage tier for the captures directory.
+# Finished raw captures are compressed to IQZ files in worker processes, the
+# `Capture.file_paths` JSON is updated to point at the compressed file, and
+# retention policies remove capture files by age, mode and free disk space.
+# Capture rows themselves are kept so their metadata stays queryable.
+
+GIB = 1024 ** 3
+# Set in `Capture.file_paths` when compressing the raw file failed; it is not retried
+COMPRESS_FAILED_KEY = "compress_failed"
+
+
+def _compress_capture(src: str, dst: str, chunk_samples: int, bits: int, level: int) -> dict:
+    """Worker process entry point; only plain arguments cross the process boundary."""
+    return compress_file(Path(src), Path(dst), chunk_samples=chunk_samples, bits=bits, level=level)
+
+
+class StorageTier:
+    """
+    Periodically compresses finished captures and applies retention policies.
+    """
+
+    def __init__(self, config):
+        """
+        Args:
+            config (AppConfig): The application's configuration object.
+        """
+        self.config = config.storage
+        self.captures_dir = Path(config.data_paths.captures)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Compression jobs in flight: future -> (capture id, source, destination)
+        self._pending: Dict[Future, Tuple[int, Path, Path]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the worker processes and the maintenance thread."""
+        self._executor = self._new_executor()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="storage-tier", daemon=True)
+        self._thread.start()
+        logging.info(f"Storage tier started with {self.config.workers} compression workers.")
+
+    def stop(self):
+        """Stops maintenance; running compression jobs finish, queued ones are left for the next start."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._collect_finished()
+            self._executor = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.config.workers, mp_context=worker_context(),
+            initializer=init_worker_logging, initargs=(logging.getLogger().getEffectiveLevel(),),
+        )
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.config.scan_interval_s)
+
+    def run_once(self):
+        """Runs a single maintenance pass."""
+        # Each step runs on its own, so a compression error cannot stop retention
+        for step in (self._collect_finished, self._submit_compression, self.apply_retention, self.ensure_free_space):
+            try:
+                step()
+            except Exception as e:
+                logging.error(f"Storage maintenance step '{step.__name__}' failed: {e}", exc_info=True)
+
+    # --- Compression ---
+
+    def _submit_compression(self):
+        capacity = 2 * self.config.workers - len(self._pending)
+        if capacity <= 0 or self._executor is None:
+            return
+
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.config.min_age_s)
+        busy = [capture_id for capture_id, _, _ in self._pending.values()]
+
+        db = database.SessionLocal()
+        try:
+            # Captures already being compressed or marked as failed are excluded
+            # before the LIMIT, so they can never starve the rest of the queue
+            captures = (
+                db.query(Capture)
+                .filter(
+                    Capture.timestamp_end.isnot(None),
+                    Capture.timestamp_end <= cutoff,
+                    func.json_extract(Capture.file_paths, "$.iq").isnot(None),
+                    func.json_extract(Capture.file_paths, f"$.{COMPRESS_FAILED_KEY}").is_(None),
+                    Capture.id.notin_(busy),
+                )
+                .order_by(Capture.timestamp_end)
+                .limit(capacity)
+                .all()
+            )
+            for capture in captures:
+                src = Path(capture.file_paths["iq"])
+                if not src.exists():
+                    logging.warning(f"Raw file of capture {capture.uuid} is missing: {src}")
+                    paths = dict(capture.file_paths)
+                    del paths["iq"]
+                    capture.file_paths = paths or null()
+                    self._add_note(capture, f"Raw file {src} was missing; not compressed.")
+                    continue
+
+                dst = src.with_suffix(".iqz")
+                bits = self.config.lossy_bits.get(capture.mode, 8)
+                args = (str(src), str(dst), self.config.chunk_samples, bits, self.config.compression_level)
+                try:
+                    future = self._executor.submit(_compress_capture, *args)
+                except BrokenProcessPool:
+                    # A worker died; jobs of the old pool are collected and retried later
+                    logging.warning("Compression worker pool is broken; restarting it.")
+                    self._executor.shutdown(wait=False)
+                    self._executor = self._new_executor()
+                    future = self._executor.submit(_compress_capture, *args)
+                self._pending[future] = (capture.id, src, dst)
+            db.commit()
+        finally:
+            db.close()
+
+    def _collect_finished(self):
+        finished = [future for future in self._pending if future.done()]
+        if not finished:
+            return
+
+        db = database.SessionLocal()
+        try:
+            for future in finished:
+                capture_id, src, dst = self._pending.pop(future)
+                if future.cancelled():
+                    # Cancelled on shutdown; the capture is picked up again after a restart
+                    continue
+                capture = db.get(Capture, capture_id)
+                try:
+                    stats = future.result()
+                except BrokenProcessPool:
+                    logging.warning(f"Compression worker died while compressing '{src}'; it will be retried.")
+                    dst.unlink(missing_ok=True)
+                    continue
+                except Exception as e:
+                    logging.error(f"Failed to compress '{src}': {e}")
+                    dst.unlink(missing_ok=True)
+                    if capture is not None and capture.file_paths and capture.file_paths.get("iq") == str(src):
+                        # Keep the raw file but never retry it
+                        capture.file_paths = {**capture.file_paths, COMPRESS_FAILED_KEY: True}
+                        self._add_note(capture, f"Compression failed: {e}")
+                        db.commit()
+                    continue
+
+                if capture is None or not capture.file_paths or capture.file_paths.get("iq") != str(src):
+                    # The capture changed while it was being compressed; discard the result
+                    dst.unlink(missing_ok=True)
+                    continue
+
+                # Assign a new dict so SQLAlchemy detects the JSON change
+                paths = dict(capture.file_paths)
+                del paths["iq"]
+                paths["iqz"] = str(dst)
+                capture.file_paths = paths
+                db.commit()
+
+                src.unlink(missing_ok=True)
+                ratio = stats["compressed_bytes"] / max(stats["raw_bytes"], 1)
+                logging.info(f"Compressed capture {capture.uuid} to {ratio:.0%} of its raw size.")
+        finally:
+            db.close()
+
+    # --- Retention ---
+
+    def _evict(self, capture: Capture, reason: str) -> int:
+        """Deletes the files of a capture and returns the number of bytes freed."""
+        freed = 0
+        for path in (capture.file_paths or {}).values():
+            if not isinstance(path, str):
+                continue
+            path = Path(path)
+            if path.exists():
+                freed += path.stat().st_size
+                path.unlink()
+
+        # SQL NULL rather than a JSON 'null' so `IS NOT NULL` filters skip the row
+        capture.file_paths = null()
+        self._add_note(capture, f"Files evicted on {datetime.datetime.utcnow():%Y-%m-%d %H:%M} UTC ({reason}).")
+        return freed
+
+    @staticmethod
+    def _add_note(capture: Capture, note: str):
+        capture.notes = f"{capture.notes} {note}" if capture.notes else note
+
+    def apply_retention(self):
+        """Evicts the files of captures older than their mode's retention period."""
+        if not self.config.retention_days:
+            return
+
+        busy = {capture_id for capture_id, _, _ in self._pending.values()}
+        now = datetime.datetime.utcnow()
+        db = database.SessionLocal()
+        try:
+            for mode, days in self.config.retention_days.items():
+                expired = (
+                    db.query(Capture)
+                    .filter(
+                        Capture.mode == mode,
+                        Capture.timestamp_start < now - datetime.timedelta(days=days),
+                        Capture.file_paths.isnot(None),
+                    )
+                    .all()
+                )
+                expired = [capture for capture in expired if capture.id not in busy and capture.file_paths]
+                for capture in expired:
+                    self._evict(capture, f"older than {days:g} days")
+                db.commit()
+                if expired:
+                    logging.info(f"Retention removed the files of {len(expired)} '{mode}' captures.")
+        finally:
+            db.close()
+
+    def ensure_free_space(self):
+        """Evicts the oldest captures, in `eviction_order`, until enough disk space is free."""
+        target = self.config.min_free_gb * GIB
+        if target <= 0 or shutil.disk_usage(self.captures_dir).free >= target:
+            return
+
+        busy = {capture_id for capture_id, _, _ in self._pending.values()}
+        evicted = 0
+        db = database.SessionLocal()
+        try:
+            for mode in self.config.eviction_order:
+                candidates = (
+                    db.query(Capture)
+                    .filter(Capture.mode == mode, Capture.file_paths.isnot(None))
+                    .order_by(Capture.timestamp_start)
+                    .yield_per(100)
+                )
+                for capture in candidates:
+                    if capture.id in busy or not capture.file_paths:
+                        continue
+                    self._evict(capture, "low disk space")
+                    evicted += 1
+                    if shutil.disk_usage(self.captures_dir).free >= target:
+                        break
+                db.commit()
+                if shutil.disk_usage(self.captures_dir).free >= target:
+                    break
+        finally:
+            db.close()
+
+        free_gb = shutil.disk_usage(self.captures_dir).free / GIB
+        if evicted:
+            logging.warning(f"Evicted the files of {evicted} captures to free disk space ({free_gb:.1f} GB free).")
+        if free_gb < self.config.min_free_gb:
+            logging.error(f"Free disk space ({free_gb:.1f} GB) is still below the configured minimum.")
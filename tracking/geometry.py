@@ -0,0 +1,155 @@
+import datetime
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+from skyfield.api import EarthSatellite, wgs84
+from skyfield.sgp4lib import theta_GMST1982
+
+# This module holds the vectorized geometry shared by the pass predictor.
+# Satellite positions are propagated once into the Earth-fixed ITRS frame and
+# every ground station only applies a cheap translation and rotation to them,
+# so the cost of adding a station does not include another SGP4 propagation.
+#
+# SGP4 output (TEME) is rotated straight into ITRS by the GMST angle. Going
+# through GCRS, as `satellite.at(t).frame_xyz(itrs)` does, applies and then
+# removes the same precession-nutation rotation, and evaluating the IAU 2000A
+# nutation series dominated the cost of a whole search.
+
+
+@dataclass
+class TimeGrid:
+    """The precomputed time terms of a propagation grid."""
+    jd_whole: np.ndarray
+    utc_fraction: np.ndarray
+    gmst_rad: np.ndarray
+    sun_xyz: np.ndarray
+
+
+def make_time_grid(timescale, start: datetime.datetime, offsets_s: np.ndarray) -> TimeGrid:
+    """
+    Builds the time grid `start + offsets_s`.
+
+    Args:
+        timescale (skyfield Timescale): Provides UT1 for the Earth rotation angle.
+        start (datetime.datetime): Timezone-aware UTC time of the first grid point.
+        offsets_s (np.ndarray): Seconds since `start` of each grid point.
+    """
+    jd_utc = start.timestamp() / 86400.0 + 2440587.5
+    jd_whole = np.floor(jd_utc)
+
+    t0 = timescale.from_datetime(start)
+    times = timescale.tt_jd(t0.whole, t0.tt_fraction + offsets_s / 86400.0)
+    gmst_rad, _ = theta_GMST1982(times.whole, times.ut1_fraction)
+
+    return TimeGrid(
+        jd_whole=np.full(offsets_s.shape, jd_whole),
+        utc_fraction=(jd_utc - jd_whole) + offsets_s / 86400.0,
+        gmst_rad=gmst_rad,
+        sun_xyz=sun_direction_itrs(times),
+    )
+
+
+def propagate_itrs(satellite: EarthSatellite, grid: TimeGrid) -> np.ndarray:
+    """
+    Propagates a satellite with SGP4 over a time grid.
+
+    Returns:
+        The ITRS positions in km, shape (3, N). Points where SGP4 fails are NaN.
+    """
+    _, r_teme, _ = satellite.model.sgp4_array(grid.jd_whole, grid.utc_fraction)
+    x, y, z = r_teme.T
+    cos_theta, sin_theta = np.cos(grid.gmst_rad), np.sin(grid.gmst_rad)
+    return np.array([cos_theta * x + sin_theta * y, -sin_theta * x + cos_theta * y, z])
+
+
+def station_frames(stations: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the Earth-fixed position and local horizon frame of each station.
+
+    Args:
+        stations (Sequence[StationConfig]): The ground stations.
+
+    Returns:
+        A tuple of the ITRS positions in km, shape (S, 3), and the rotation
+        matrices from ITRS to East-North-Up, shape (S, 3, 3).
+    """
+    positions = np.empty((len(stations), 3))
+    rotations = np.empty((len(stations), 3, 3))
+
+    for i, station in enumerate(stations):
+        location = wgs84.latlon(
+            latitude_degrees=station.latitude,
+            longitude_degrees=station.longitude,
+            elevation_m=station.elevation_m,
+        )
+        positions[i] = location.itrs_xyz.km
+
+        lat = np.radians(station.latitude)
+        lon = np.radians(station.longitude)
+        sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+        sin_lon, cos_lon = np.sin(lon), np.cos(lon)
+        rotations[i] = [
+            [-sin_lon, cos_lon, 0.0],
+            [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+            [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat],
+        ]
+
+    return positions, rotations
+
+
+def topocentric(
+    sat_xyz_km: np.ndarray, positions: np.ndarray, rotations: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts satellite ITRS positions into the horizon frame of every station.
+
+    Args:
+        sat_xyz_km (np.ndarray): Satellite ITRS positions in km, shape (3, N).
+        positions (np.ndarray): Station ITRS positions from `station_frames`.
+        rotations (np.ndarray): Station ENU rotations from `station_frames`.
+
+    Returns:
+        A tuple of elevation and azimuth in degrees and slant range in km,
+        each with shape (S, N).
+    """
+    relative = sat_xyz_km[np.newaxis, :, :] - positions[:, :, np.newaxis]
+    enu = np.einsum("sij,sjn->sin", rotations, relative)
+
+    slant_range = np.sqrt(np.einsum("sin,sin->sn", enu, enu))
+    elevation = np.degrees(np.arcsin(enu[:, 2] / slant_range))
+    azimuth = np.degrees(np.arctan2(enu[:, 0], enu[:, 1])) % 360.0
+
+    return elevation, azimuth, slant_range
+
+
+def sun_direction_itrs(times) -> np.ndarray:
+    """
+    Computes the unit vector towards the Sun in the Earth-fixed frame using
+    the Astronomical Almanac's low-precision formulae (about 0.01 degrees),
+    which is ample for day/night decisions and needs no ephemeris download.
+
+    Args:
+        times (skyfield Time): The (vector) times.
+
+    Returns:
+        An array of unit vectors, shape (3, N).
+    """
+    n = np.atleast_1d(times.tt) - 2451545.0
+    mean_longitude = np.radians(280.460 + 0.9856474 * n)
+    mean_anomaly = np.radians(357.528 + 0.9856003 * n)
+    ecliptic_longitude = mean_longitude + np.radians(1.915) * np.sin(mean_anomaly) \
+        + np.radians(0.020) * np.sin(2.0 * mean_anomaly)
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+
+    x = np.cos(ecliptic_longitude)
+    y = np.cos(obliquity) * np.sin(ecliptic_longitude)
+    z = np.sin(obliquity) * np.sin(ecliptic_longitude)
+
+    # Rotate from the equatorial frame into the Earth-fixed frame
+    theta = np.radians(np.atleast_1d(times.gmst) * 15.0)
+    return np.array([
+        np.cos(theta) * x + np.sin(theta) * y,
+        -np.sin(theta) * x + np.cos(theta) * y,
+        z,
+    ])
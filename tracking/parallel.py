@@ -0,0 +1,94 @@
+import atexit
+import datetime
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from skyfield.api import EarthSatellite, load
+
+from core.log import init_worker_logging, worker_context
+
+from .predictor import SatellitePass, search_satellites
+
+# This module runs pass searches in a pool of worker processes. Only compact
+# TLE lines cross the process boundary, never pickled skyfield objects. Each
+# worker loads the timescale once when it starts and keeps the satellites it
+# has built, so repeated searches reuse warm workers.
+
+# --- Worker Process State ---
+_timescale = None
+_satellites: Dict[Tuple[str, str, str], EarthSatellite] = {}
+
+
+def _init_worker(log_level: int):
+    global _timescale
+    init_worker_logging(log_level)
+    _timescale = load.timescale()
+
+
+def _satellite(name: str, line1: str, line2: str) -> EarthSatellite:
+    key = (name, line1, line2)
+    satellite = _satellites.get(key)
+    if satellite is None:
+        if len(_satellites) > 4096:
+            # Element sets are replaced on every TLE refresh; drop the stale ones
+            _satellites.clear()
+        satellite = _satellites[key] = EarthSatellite(line1, line2, name, _timescale)
+    return satellite
+
+
+def search_shard(
+    tles: List[Tuple[str, str, str]],
+    start: datetime.datetime,
+    offsets_s: np.ndarray,
+    station_names: Sequence[str],
+    frames,
+    min_elevation: float,
+) -> Dict[str, List[SatellitePass]]:
+    """
+    Worker entry point: searches the passes of one shard of satellites.
+
+    Args:
+        tles (List[Tuple[str, str, str]]): (name, line 1, line 2) of each satellite.
+        The remaining arguments are those of `search_satellites`.
+
+    Returns:
+        A dictionary mapping station names to passes sorted by rise time.
+    """
+    satellites = [(name, _satellite(name, line1, line2)) for name, line1, line2 in tles]
+    return search_satellites(
+        satellites, _timescale, start, offsets_s, station_names, frames, min_elevation
+    )
+
+
+# --- Shared Pool ---
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the shared worker pool, recreating it if the worker count changed."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=worker_context(),
+                initializer=_init_worker, initargs=(logging.getLogger().getEffectiveLevel(),),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    """Stops the shared worker pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
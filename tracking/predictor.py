@@ -1,12 +1,19 @@
 import datetime
+import heapq
 import logging
+import threading
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from skyfield.api import EarthSatellite, Topos, wgs84
+import numpy as np
+from skyfield.api import EarthSatellite
 
+from .geometry import make_time_grid, propagate_itrs, station_frames, topocentric
 from .tle import TLEManager
 
+# Extra time covered by each computed schedule beyond the requested window
+SCHEDULE_MARGIN = datetime.timedelta(hours=6)
+
 
 @dataclass
 class SatellitePass:
@@ -16,6 +23,12 @@ class SatellitePass:
     culminate_time: datetime.datetime
     set_time: datetime.datetime
     max_elevation_deg: float
+    station_name: str = "default"
+    # Geometry summaries used for scoring (see tracking/scoring.py)
+    elevation_time_deg_s: Optional[float] = None
+    min_range_km: Optional[float] = None
+    sunlit_fraction: Optional[float] = None
+    score: Optional[float] = None
 
     @property
     def duration(self) -> datetime.timedelta:
@@ -29,88 +42,468 @@ class SatellitePass:
         return self.rise_time <= now <= self.set_time
 
 
+@dataclass
+class _Schedule:
+    """The cached passes of one station over a prediction window."""
+    window_end: datetime.datetime
+    tle_generation: int
+    passes: List[SatellitePass]
+
+
+def _crossing_offsets(elevation: np.ndarray, offsets_s: np.ndarray, before: np.ndarray, threshold: float) -> np.ndarray:
+    """Linearly interpolates the time at which elevation crosses the threshold between two grid points."""
+    after = before + 1
+    fraction = (threshold - elevation[before]) / (elevation[after] - elevation[before])
+    return offsets_s[before] + fraction * (offsets_s[after] - offsets_s[before])
+
+
+def _refine_culminations(
+    propagate: Callable[[np.ndarray], np.ndarray],
+    frames,
+    station_indices: np.ndarray,
+    culminate_s: np.ndarray,
+    half_width_s: float,
+    iterations: int = 5,
+    points: int = 9,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Locates the culminations of several passes at once. Each iteration
+    evaluates `points` times spread over every pass's bracket in a single
+    propagation and shrinks the bracket around the highest one, so the
+    bracket narrows by a factor of (points - 1) / 2 per iteration.
+
+    Returns:
+        The refined culmination offsets in seconds and the elevations there.
+    """
+    spread = np.linspace(-1.0, 1.0, points)
+    rows = np.arange(culminate_s.size)
+    centers = culminate_s.astype(np.float64)
+    elevations = np.full(centers.size, -90.0)
+    for _ in range(iterations):
+        offsets = centers[:, np.newaxis] + half_width_s * spread
+        elevation, _, _ = topocentric(propagate(offsets.ravel()), *frames)
+        # Each pass only needs its own station's elevations
+        elevation = elevation[station_indices[:, np.newaxis], np.arange(offsets.size).reshape(offsets.shape)]
+        best = np.argmax(elevation, axis=1)
+        centers = offsets[rows, best]
+        elevations = elevation[rows, best]
+        half_width_s *= 2.0 / (points - 1)
+    return centers, elevations
+
+
+def _refine_crossings(
+    propagate: Callable[[np.ndarray], np.ndarray],
+    frames,
+    station_indices: np.ndarray,
+    before_s: np.ndarray,
+    step_s: float,
+    rising: np.ndarray,
+    threshold: float,
+    iterations: int = 3,
+    points: int = 9,
+) -> np.ndarray:
+    """
+    Locates the threshold crossings of several passes at once. Each crossing
+    starts bracketed by the grid step after `before_s`; each iteration
+    evaluates `points` times spread over every bracket in a single
+    propagation and keeps the interval in which the elevation crosses, so
+    the bracket narrows by a factor of (points - 1) per iteration. The
+    crossing is then interpolated linearly within the final bracket.
+
+    Args:
+        rising (np.ndarray): True for rises, False for sets.
+
+    Returns:
+        The refined crossing offsets in seconds.
+    """
+    spread = np.linspace(0.0, 1.0, points)
+    rows = np.arange(before_s.size)
+    lo = before_s.astype(np.float64)
+    width_s = step_s
+    for _ in range(iterations):
+        offsets = lo[:, np.newaxis] + width_s * spread
+        elevation, _, _ = topocentric(propagate(offsets.ravel()), *frames)
+        elevation = elevation[station_indices[:, np.newaxis], np.arange(offsets.size).reshape(offsets.shape)]
+        # First point on the far side of the threshold; the bracket end always is
+        crossed = (elevation >= threshold) == rising[:, np.newaxis]
+        after = np.where(crossed[:, 1:].any(axis=1), np.argmax(crossed[:, 1:], axis=1) + 1, points - 1)
+        lo = offsets[rows, after - 1]
+        el_lo, el_hi = elevation[rows, after - 1], elevation[rows, after]
+        width_s /= points - 1
+
+    fraction = np.clip((threshold - el_lo) / (el_hi - el_lo), 0.0, 1.0)
+    return lo + fraction * width_s
+
+
+def find_satellite_passes(
+    satellite_name: str,
+    sat_xyz_km: np.ndarray,
+    offsets_s: np.ndarray,
+    start: datetime.datetime,
+    station_names: Sequence[str],
+    frames,
+    min_elevation: float,
+    propagate: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+    sun_xyz: Optional[np.ndarray] = None,
+) -> Dict[str, List[SatellitePass]]:
+    """
+    Finds the complete passes of one satellite over every station.
+
+    The satellite is propagated once by the caller; here its positions are
+    only rotated into each station's horizon frame and scanned for intervals
+    above the elevation mask. Passes already in progress at the start of the
+    grid or still in progress at its end are skipped.
+
+    Args:
+        satellite_name (str): Name reported on the resulting passes.
+        sat_xyz_km (np.ndarray): Satellite ITRS positions in km, shape (3, N).
+        offsets_s (np.ndarray): Seconds since `start` of each grid point.
+        start (datetime.datetime): UTC time of the first grid point.
+        station_names (Sequence[str]): Station names, in the order of `frames`.
+        frames: The (positions, rotations) tuple from `station_frames`.
+        min_elevation (float): Elevation mask in degrees.
+        propagate (Callable, optional): Maps offsets in seconds to ITRS
+            positions in km. When given, the rise, culmination and set times
+            are refined to well under a second and the maximum elevations
+            evaluated exactly at the culminations, in a few batched
+            propagations.
+        sun_xyz (np.ndarray, optional): Unit vectors towards the Sun on the
+            grid, shape (3, N). When given, the fraction of each pass whose
+            ground track is in daylight is recorded.
+
+    Returns:
+        A dictionary mapping station names to their passes, sorted by rise time.
+    """
+    elevation, _, slant_range = topocentric(sat_xyz_km, *frames)
+    # The sub-satellite point is in daylight when the satellite is on the Sun's side of the Earth
+    sunlit = np.einsum("in,in->n", sat_xyz_km, sun_xyz) > 0 if sun_xyz is not None else None
+    step_s = float(offsets_s[1] - offsets_s[0]) if offsets_s.size > 1 else 0.0
+
+    # (station index, rise, culmination, set, max elevation, geometry summaries) per pass
+    found = []
+    # Offset of the grid point before each rise and set, in the order of `found`
+    rise_before_s, set_before_s = [], []
+    for s in range(len(station_names)):
+        el = elevation[s]
+        above = el >= min_elevation
+        edges = np.diff(above.astype(np.int8))
+        # Index of the last grid point before each rise and each set
+        rises = np.flatnonzero(edges == 1)
+        sets = np.flatnonzero(edges == -1)
+        if above[0]:
+            sets = sets[1:]
+        rises = rises[:len(sets)]
+
+        rise_offsets = _crossing_offsets(el, offsets_s, rises, min_elevation)
+        set_offsets = _crossing_offsets(el, offsets_s, sets, min_elevation)
+
+        rise_before_s.extend(offsets_s[rises])
+        set_before_s.extend(offsets_s[sets])
+        for first, last, rise_s, set_s in zip(rises + 1, sets, rise_offsets, set_offsets):
+            # Locate the culmination with a parabola through the peak and its neighbours
+            peak = first + int(np.argmax(el[first:last + 1]))
+            y0, y1, y2 = el[peak - 1], el[peak], el[peak + 1]
+            curvature = y0 - 2.0 * y1 + y2
+            shift = 0.5 * (y0 - y2) / curvature if curvature < 0 else 0.0
+            culminate_s = offsets_s[peak] + shift * (offsets_s[peak + 1] - offsets_s[peak])
+
+            summaries = {
+                "elevation_time_deg_s": float(np.sum(el[first:last + 1]) * step_s),
+                "min_range_km": float(np.min(slant_range[s, first:last + 1])),
+                "sunlit_fraction": float(np.mean(sunlit[first:last + 1])) if sunlit is not None else None,
+            }
+            found.append((s, rise_s, culminate_s, set_s, y1 - 0.25 * (y0 - y2) * shift, summaries))
+
+    if found and propagate is not None:
+        # Near the zenith elevation peaks too sharply for the grid parabola, so
+        # the culmination is located by a batched search on the propagator
+        station_indices = np.array([f[0] for f in found])
+        culminate_offsets, max_elevations = _refine_culminations(
+            propagate, frames, station_indices, np.array([f[2] for f in found]), step_s,
+        )
+        # Rises and sets are refined together, one propagation per iteration
+        crossings = _refine_crossings(
+            propagate, frames, np.concatenate([station_indices, station_indices]),
+            np.array(rise_before_s + set_before_s), step_s,
+            np.repeat([True, False], len(found)), min_elevation,
+        )
+        found = [
+            (s, r, c, st, e, extra)
+            for (s, _, _, _, _, extra), r, c, st, e in zip(
+                found, crossings[:len(found)], culminate_offsets, crossings[len(found):], max_elevations,
+            )
+        ]
+
+    passes: Dict[str, List[SatellitePass]] = {name: [] for name in station_names}
+    for s, rise_s, culminate_s, set_s, max_elevation, summaries in found:
+        passes[station_names[s]].append(SatellitePass(
+            satellite_name=satellite_name,
+            rise_time=start + datetime.timedelta(seconds=float(rise_s)),
+            culminate_time=start + datetime.timedelta(seconds=float(culminate_s)),
+            set_time=start + datetime.timedelta(seconds=float(set_s)),
+            max_elevation_deg=float(max_elevation),
+            station_name=station_names[s],
+            **summaries,
+        ))
+
+    return passes
+
+
+def search_satellites(
+    satellites: Iterable[Tuple[str, EarthSatellite]],
+    timescale,
+    start: datetime.datetime,
+    offsets_s: np.ndarray,
+    station_names: Sequence[str],
+    frames,
+    min_elevation: float,
+) -> Dict[str, List[SatellitePass]]:
+    """
+    Propagates each satellite once over a shared time grid and extracts the
+    passes of all stations from it.
+
+    Returns:
+        A dictionary mapping station names to passes sorted by rise time.
+    """
+    grid = make_time_grid(timescale, start, offsets_s)
+
+    results: Dict[str, List[SatellitePass]] = {name: [] for name in station_names}
+    for sat_name, satellite in satellites:
+        def propagate(offsets, satellite=satellite):
+            return propagate_itrs(satellite, make_time_grid(timescale, start, offsets))
+
+        try:
+            found = find_satellite_passes(
+                sat_name, propagate_itrs(satellite, grid), offsets_s, start, station_names,
+                frames, min_elevation, propagate, grid.sun_xyz,
+            )
+        except Exception as e:
+            logging.error(f"Could not predict passes for {sat_name}: {e}")
+            continue
+        for name, passes in found.items():
+            results[name].extend(passes)
+
+    # Sort all passes chronologically
+    for passes in results.values():
+        passes.sort(key=lambda p: p.rise_time)
+
+    return results
+
+
 class PassPredictor:
     """
-    Calculates upcoming satellite passes over a given ground station location.
+    Calculates upcoming satellite passes over one or more ground stations.
+
+    Each satellite is propagated once per time grid and the resulting
+    positions are shared by all stations, so the cost grows with satellites
+    plus stations rather than their product. Schedules are cached per
+    station and recomputed only when they no longer cover the requested
+    window or the TLE data has been reloaded.
     """
 
-    def __init__(self, config, tle_manager: TLEManager):
+    def __init__(self, config, tle_manager: TLEManager, stations: Optional[Iterable] = None,
+                 clock: Optional[Callable[[], datetime.datetime]] = None):
         """
         Initializes the PassPredictor.
 
         Args:
             config (AppConfig): The application's configuration object.
             tle_manager (TLEManager): An instance of the TLEManager.
+            stations (Iterable[StationConfig], optional): The stations to plan
+                for. Defaults to every station in the configuration.
+            clock (Callable[[], datetime.datetime], optional): Returns the current
+                timezone-aware UTC time. Defaults to the system clock; the
+                simulator injects a virtual one.
         """
         self.config = config
         self.tle_manager = tle_manager
+        self.clock = clock or (lambda: datetime.datetime.now(datetime.timezone.utc))
 
-        # Define the ground station's location as a skyfield Topos object
-        self.station: Topos = wgs84.latlon(
-            latitude_degrees=config.station.latitude,
-            longitude_degrees=config.station.longitude,
-            elevation_m=config.station.elevation_m
-        )
+        self.stations = self._station_map(stations if stations is not None else config.all_stations())
+        self.primary_station = next(iter(self.stations))
 
         self.min_elevation = config.noaa.min_elevation_deg
+        self.grid_step_s = config.tracking.grid_step_s
+        self.workers = config.tracking.workers
         self.timescale = self.tle_manager.timescale
 
-    def find_upcoming_passes(self, hours_ahead: int = 48) -> List[SatellitePass]:
+        # Optional PassScorer; scores are computed once per schedule and cached with it
+        self.scorer = None
+
+        self._schedules: Dict[str, _Schedule] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _station_map(stations: Iterable) -> Dict:
+        station_map = {}
+        for station in stations:
+            if station.name in station_map:
+                raise ValueError(f"Duplicate ground station name '{station.name}'.")
+            station_map[station.name] = station
+        if not station_map:
+            raise ValueError("At least one ground station is required.")
+        return station_map
+
+    def reconfigure(self, config) -> List[str]:
+        """
+        Switches to a new configuration, dropping only the cached schedules it
+        affects: those of added, removed or moved stations, or all of them if
+        the minimum elevation or the grid step changed.
+
+        Args:
+            config (AppConfig): The new configuration.
+
+        Returns:
+            The names of the stations whose schedules were dropped.
+
+        Raises:
+            ValueError: If the new station list is invalid; nothing is changed then.
+        """
+        stations = self._station_map(config.all_stations())
+        with self._lock:
+            if (config.noaa.min_elevation_deg != self.min_elevation
+                    or config.tracking.grid_step_s != self.grid_step_s):
+                affected = set(self.stations) | set(stations)
+            else:
+                affected = {
+                    name for name in set(self.stations) | set(stations)
+                    if self.stations.get(name) != stations.get(name)
+                }
+            for name in affected:
+                self._schedules.pop(name, None)
+
+            self.config = config
+            self.stations = stations
+            self.primary_station = next(iter(stations))
+            self.min_elevation = config.noaa.min_elevation_deg
+            self.grid_step_s = config.tracking.grid_step_s
+            self.workers = config.tracking.workers
+        return sorted(affected)
+
+    def rescore(self):
+        """Re-scores the cached schedules, e.g. after the scoring weights changed."""
+        if self.scorer is None:
+            return
+        with self._lock:
+            self.scorer.score_passes([p for schedule in self._schedules.values() for p in schedule.passes])
+
+    def invalidate_cache(self, station_names: Optional[Iterable[str]] = None):
+        """Drops the cached schedules of the given stations, or of all stations."""
+        with self._lock:
+            if station_names is None:
+                self._schedules.clear()
+            else:
+                for name in station_names:
+                    self._schedules.pop(name, None)
+
+    def find_upcoming_passes(self, hours_ahead: int = 48, station: Optional[str] = None) -> List[SatellitePass]:
         """
-        Finds all valid upcoming passes for all tracked satellites.
+        Finds all valid upcoming passes for all tracked satellites over one station.
 
         Args:
             hours_ahead (int): How many hours into the future to search for passes.
+            station (str, optional): The station name. Defaults to the primary station.
 
         Returns:
             A list of SatellitePass objects, sorted by their rise time.
         """
+        station = station or self.primary_station
+        return self.find_upcoming_passes_by_station(hours_ahead, [station])[station]
+
+    def find_upcoming_passes_by_station(
+        self, hours_ahead: int = 48, stations: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[SatellitePass]]:
+        """
+        Finds all valid upcoming passes for several stations at once.
+
+        Args:
+            hours_ahead (int): How many hours into the future to search for passes.
+            stations (Iterable[str], optional): Station names. Defaults to all stations.
+
+        Returns:
+            A dictionary mapping station names to passes sorted by rise time.
+
+        Raises:
+            KeyError: If a station name is not known to the predictor.
+        """
+        names = list(stations) if stations is not None else list(self.stations)
+        for name in names:
+            if name not in self.stations:
+                raise KeyError(f"Unknown ground station '{name}'.")
+
         if not self.tle_manager.satellites:
             logging.info("Satellites not loaded. Loading TLE data now.")
             self.tle_manager.load_satellites()
 
-        t0 = self.timescale.now()
-        t1 = self.timescale.from_datetime(
-            t0.to_datetime() + datetime.timedelta(hours=hours_ahead)
-        )
+        now = self.clock()
+        window_end = now + datetime.timedelta(hours=hours_ahead)
+
+        with self._lock:
+            generation = self.tle_manager.generation
+            stale = [
+                name for name in names
+                if name not in self._schedules
+                or self._schedules[name].tle_generation != generation
+                or self._schedules[name].window_end < window_end
+            ]
+            if stale:
+                # Compute past the requested window so repeated requests keep hitting the cache
+                horizon_s = hours_ahead * 3600.0 + SCHEDULE_MARGIN.total_seconds()
+                offsets_s = np.arange(0.0, horizon_s + self.grid_step_s, self.grid_step_s)
+                computed_end = now + datetime.timedelta(seconds=float(offsets_s[-1]))
+                computed = self._compute_passes([self.stations[name] for name in stale], now, offsets_s)
+                if self.scorer is not None:
+                    self.scorer.score_passes([p for passes in computed.values() for p in passes])
+                for name, passes in computed.items():
+                    self._schedules[name] = _Schedule(computed_end, generation, passes)
+                    logging.info(
+                        f"Found {len(passes)} upcoming valid passes for station '{name}' "
+                        f"in the next {hours_ahead} hours."
+                    )
+            schedules = {name: self._schedules[name] for name in names}
+
+        return {
+            name: [p for p in schedule.passes if p.rise_time >= now and p.set_time <= window_end]
+            for name, schedule in schedules.items()
+        }
+
+    def _compute_passes(
+        self, stations: List, start: datetime.datetime, offsets_s: np.ndarray
+    ) -> Dict[str, List[SatellitePass]]:
+        """
+        Propagates every satellite once over a shared time grid and extracts
+        the passes of all the given stations from it.
+
+        Returns:
+            A dictionary mapping station names to passes sorted by rise time.
+        """
+        names = [station.name for station in stations]
+        frames = station_frames(stations)
+
+        if self.workers <= 1:
+            return search_satellites(
+                self.tle_manager.satellites.items(), self.timescale, start, offsets_s,
+                names, frames, self.min_elevation,
+            )
+        return self._search_parallel(start, offsets_s, names, frames)
+
+    def _search_parallel(self, start: datetime.datetime, offsets_s: np.ndarray,
+                         names: List[str], frames) -> Dict[str, List[SatellitePass]]:
+        """Shards the satellites across the worker pool and merges the sorted shard results."""
+        from .parallel import get_pool, search_shard
+
+        tle_lines = self.tle_manager.tle_lines
+        tles = [(name, *tle_lines[name]) for name in self.tle_manager.satellites if name in tle_lines]
+        # One shard per worker keeps the per-task overhead (pickling, time grid) to a minimum
+        shards = [tles[i::self.workers] for i in range(self.workers)]
+        pool = get_pool(self.workers)
+        futures = [
+            pool.submit(search_shard, shard, start, offsets_s, names, frames, self.min_elevation)
+            for shard in shards if shard
+        ]
+        shard_results = [future.result() for future in futures]
 
-        all_passes: List[SatellitePass] = []
-        for name, satellite in self.tle_manager.satellites.items():
-            try:
-                times, events = satellite.find_events(
-                    self.station, t0, t1, altitude_degrees=self.min_elevation
-                )
-
-                # Group events by pass (rise=0, culmination=1, set=2)
-                event_groups = []
-                for t, event in zip(times, events):
-                    if event == 0:  # A new pass starts with a rise event
-                        event_groups.append({})
-                    if event_groups:
-                        event_groups[-1][event] = t
-
-                # Create SatellitePass objects from complete groups
-                for group in event_groups:
-                    if 0 in group and 1 in group and 2 in group:
-                        # Calculate the precise max elevation at culmination time
-                        diff = satellite - self.station
-                        alt, _, _ = diff.at(group[1]).altaz()
-
-                        pass_obj = SatellitePass(
-                            satellite_name=name,
-                            rise_time=group[0].to_datetime(),
-                            culminate_time=group[1].to_datetime(),
-                            set_time=group[2].to_datetime(),
-                            max_elevation_deg=alt.degrees,
-                        )
-                        all_passes.append(pass_obj)
-
-            except Exception as e:
-                logging.error(f"Could not predict passes for {name}: {e}")
-                continue
-
-        # Sort all passes chronologically
-        all_passes.sort(key=lambda p: p.rise_time)
-
-        logging.info(f"Found {len(all_passes)} upcoming valid passes in the next {hours_ahead} hours.")
-        return all_passes
\ No newline at end of file
+        return {
+            name: list(heapq.merge(*(result[name] for result in shard_results), key=lambda p: p.rise_time))
+            for name in names
+        }
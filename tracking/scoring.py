@@ -0,0 +1,122 @@
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+
+from core import database
+from core.models import NOAAImage
+
+from .predictor import SatellitePass
+
+# This module scores predicted passes so the scheduler can choose between
+# overlapping passes and skip ones that are not worth the disk space.
+#
+# Each term is mapped onto [0, 1] with fixed reference values rather than by
+# normalizing within a window, so scores from different schedules and
+# stations stay comparable:
+#   elevation-time  integral of elevation over the pass, saturating
+#   range           closest slant range, from near-overhead to horizon-grazing
+#   sunlit          fraction of the ground track in daylight (visible channel)
+#   snr             mean historical decode SNR of the satellite
+
+ELEVATION_TIME_SCALE_DEG_S = 20000.0
+RANGE_NEAR_KM = 850.0
+RANGE_FAR_KM = 2500.0
+SNR_GOOD_DB = 30.0
+# Neutral value for satellites that have never been decoded
+SNR_UNKNOWN = 0.5
+
+
+class PassScorer:
+    """
+    Computes a quality score in [0, 1] for satellite passes. Attach it to a
+    PassPredictor (`predictor.scorer = scorer`) to score every schedule once,
+    when it is computed, and cache the scores with it.
+    """
+
+    def __init__(self, config, snr_ttl_s: float = 3600.0):
+        """
+        Args:
+            config (AppConfig): The application's configuration object.
+            snr_ttl_s (float): How long the historical SNR statistics are cached.
+        """
+        self.configure(config)
+        self.snr_ttl_s = snr_ttl_s
+        self._snr_by_satellite: Dict[str, float] = {}
+        self._snr_loaded_at: Optional[float] = None
+
+    def configure(self, config):
+        """Takes the score weights from a (new) configuration."""
+        weights = config.tracking.scoring
+        self.weights = np.array([weights.elevation_time, weights.range, weights.sunlit, weights.snr])
+
+    def historical_snr(self) -> Dict[str, float]:
+        """Returns the mean decode SNR in dB of each satellite, cached for `snr_ttl_s`."""
+        now = time.monotonic()
+        if self._snr_loaded_at is not None and now - self._snr_loaded_at < self.snr_ttl_s:
+            return self._snr_by_satellite
+        if database.SessionLocal is None:
+            return self._snr_by_satellite
+
+        db = database.SessionLocal()
+        try:
+            rows = (
+                db.query(NOAAImage.satellite_name, func.avg(NOAAImage.snr_db))
+                .filter(NOAAImage.snr_db.isnot(None))
+                .group_by(NOAAImage.satellite_name)
+                .all()
+            )
+            self._snr_by_satellite = {name: float(snr) for name, snr in rows}
+            self._snr_loaded_at = now
+        except Exception as e:
+            logging.error(f"Could not load historical decode SNR: {e}")
+        finally:
+            db.close()
+        return self._snr_by_satellite
+
+    def score_passes(self, passes: List[SatellitePass]) -> np.ndarray:
+        """
+        Scores all passes in one vectorized computation and stores each score
+        on its pass.
+
+        Returns:
+            The scores, in the order of `passes`.
+        """
+        if not passes:
+            return np.empty(0)
+
+        snr_by_satellite = self.historical_snr()
+        nan = float("nan")
+        features = np.array([
+            (
+                p.elevation_time_deg_s if p.elevation_time_deg_s is not None else nan,
+                p.min_range_km if p.min_range_km is not None else nan,
+                p.sunlit_fraction if p.sunlit_fraction is not None else nan,
+                snr_by_satellite.get(p.satellite_name, nan),
+            )
+            for p in passes
+        ]).T
+
+        terms = np.vstack([
+            1.0 - np.exp(-features[0] / ELEVATION_TIME_SCALE_DEG_S),
+            np.clip((RANGE_FAR_KM - features[1]) / (RANGE_FAR_KM - RANGE_NEAR_KM), 0.0, 1.0),
+            features[2],
+            np.clip(features[3] / SNR_GOOD_DB, 0.0, 1.0),
+        ])
+        terms[3] = np.where(np.isnan(terms[3]), SNR_UNKNOWN, terms[3])
+
+        # Missing geometry terms are left out of the weighted mean rather than counted as zero
+        weights = np.where(np.isnan(terms), 0.0, self.weights[:, np.newaxis])
+        total = weights.sum(axis=0)
+        scores = np.where(total > 0, np.nansum(terms * weights, axis=0) / np.where(total > 0, total, 1.0), 0.0)
+
+        for p, score in zip(passes, scores):
+            p.score = float(score)
+        return scores
+
+
+def rank_passes(passes: List[SatellitePass]) -> List[SatellitePass]:
+    """Orders passes from best to worst score; unscored passes go last."""
+    return sorted(passes, key=lambda p: (p.score is None, -(p.score or 0.0), p.rise_time))
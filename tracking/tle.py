@@ -1,7 +1,7 @@
 import datetime
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 
 import requests
 from skyfield.api import load, EarthSatellite
@@ -9,6 +9,18 @@ from skyfield.api import load, EarthSatellite
 # --- Constants ---
 TLE_CACHE_FILENAME = "noaa_tle.txt"
 
+def parse_tle_lines(tle_data: str) -> Dict[str, Tuple[str, str]]:
+    """Extracts the two element lines of each named satellite from TLE text."""
+    lines = [line.rstrip() for line in tle_data.splitlines() if line.strip()]
+    tle_lines = {}
+    for i in range(1, len(lines) - 1):
+        if lines[i].startswith("1 ") and lines[i + 1].startswith("2 "):
+            name = lines[i - 1].strip()
+            if name.startswith("0 "):
+                name = name[2:]
+            tle_lines[name] = (lines[i], lines[i + 1])
+    return tle_lines
+
 class TLEManager:
     """
     Manages the downloading, caching, and loading of TLE (Two-Line Element)
@@ -30,6 +42,10 @@ class TLEManager:
 
         self.timescale = load.timescale()
         self.satellites: Dict[str, EarthSatellite] = {}
+        # Raw TLE lines by satellite name; compact to ship to worker processes
+        self.tle_lines: Dict[str, Tuple[str, str]] = {}
+        # Incremented on every reload so dependents can detect stale results
+        self.generation = 0
 
     def _is_cache_valid(self) -> bool:
         """Checks if the cached TLE file exists and is within the cache duration."""
@@ -86,6 +102,8 @@ class TLEManager:
         # skyfield's load.tle_file expects a string path, not a Path object.
         sats = load.tle_file(str(self.cache_file_path))
         self.satellites = {sat.name: sat for sat in sats}
+        self.tle_lines = parse_tle_lines(tle_data)
+        self.generation += 1
 
         logging.info(f"Loaded {len(self.satellites)} satellites: {list(self.satellites.keys())}")
         return self.satellites
\ No newline at end of file